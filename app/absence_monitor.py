@@ -0,0 +1,113 @@
+# app/absence_monitor.py
+"""
+Chronic-absenteeism detection over a rolling window of school days.
+
+A student is flagged when their absence rate over the last
+CHRONIC_ABSENCE_WINDOW_DAYS school days reaches CHRONIC_ABSENCE_THRESHOLD.
+School days are the dates on which any attendance was recorded, less the dates in
+the holiday calendar.
+The rate is computed across every class the student attends: absent and excused
+sessions over all sessions, holidays left out.
+
+The whole school is evaluated in one pass: the window's records are read as
+(student_id, status) tuples into a DataFrame and reduced with a groupby. The
+result is persisted on Student.is_chronically_absent, like is_in_arrears, so
+list pages can filter on it with a plain WHERE.
+
+`flask update_absence_flags` re-evaluates every student (run it daily, as the
+window moves forward with each new school day). The attendance save routes call
+refresh_chronic_absence_flags() for just the students they saved, after their
+commit, so the write transaction never waits on this.
+"""
+from datetime import date
+import pandas as pd
+from flask import current_app
+from app import db
+from app.models import Attendance, DailyAttendanceRollup, Student
+from app.holiday_calendar import get_holiday_calendar
+
+ABSENCE_STATUSES = ('absent', 'excused')
+HOLIDAY_STATUSES = ('public_holiday', 'school_holiday')
+
+
+def school_days_window(window_days, as_of=None):
+    """
+    The first date of the last `window_days` school days up to `as_of` (default
+    today), or None if there are none. The recorded dates are read newest first
+    in one query from the daily rollup (one row per class per date, indexed by
+    date), over-fetching by the number of holidays so that skipping them in
+    Python still leaves enough.
+    """
+    as_of = as_of or date.today()
+    holiday_dates = get_holiday_calendar().dates_between(date.min, as_of)
+    recorded_dates = db.session.query(DailyAttendanceRollup.date).filter(
+        DailyAttendanceRollup.date <= as_of
+    ).distinct().order_by(DailyAttendanceRollup.date.desc()).limit(window_days + len(holiday_dates))
+    school_days = [day for (day,) in recorded_dates if day not in holiday_dates][:window_days]
+    return school_days[-1] if school_days else None
+
+
+def compute_absence_rates(window_start, as_of, student_ids=None):
+    """
+    Returns a DataFrame indexed by student_id with columns 'sessions' and
+    'absence_rate' over window_start..as_of, optionally limited to `student_ids`.
+    """
+    query = db.session.query(Attendance.student_id, Attendance.status).filter(
+        Attendance.date >= window_start, Attendance.date <= as_of,
+        Attendance.status.notin_(HOLIDAY_STATUSES)
+    )
+    if student_ids is not None:
+        query = query.filter(Attendance.student_id.in_(student_ids))
+    records = pd.DataFrame(query.all(), columns=['student_id', 'status'])
+    records['absent'] = records['status'].isin(ABSENCE_STATUSES)
+    grouped = records.groupby('student_id')['absent']
+    return pd.DataFrame({'sessions': grouped.size(), 'absence_rate': grouped.mean()})
+
+
+def update_chronic_absence_flags(student_ids=None, as_of=None):
+    """
+    Re-evaluates the chronic-absence flag for `student_ids` (default: every student)
+    and writes only the flags that changed. Does not commit.
+    Returns (number flagged, number cleared).
+    """
+    config = current_app.config
+    as_of = as_of or date.today()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0, 0
+
+    window_start = school_days_window(config['CHRONIC_ABSENCE_WINDOW_DAYS'], as_of)
+    flagged_ids = set()
+    if window_start is not None:
+        rates = compute_absence_rates(window_start, as_of, student_ids)
+        chronic = rates[(rates['sessions'] >= config['CHRONIC_ABSENCE_MIN_SESSIONS']) &
+                        (rates['absence_rate'] >= config['CHRONIC_ABSENCE_THRESHOLD'])]
+        flagged_ids = set(chronic.index.tolist())
+
+    current_query = db.session.query(Student.id).filter(Student.is_chronically_absent == True)
+    if student_ids is not None:
+        current_query = current_query.filter(Student.id.in_(student_ids))
+    currently_flagged = {row[0] for row in current_query}
+
+    to_flag = flagged_ids - currently_flagged
+    to_clear = currently_flagged - flagged_ids
+    if to_flag:
+        Student.query.filter(Student.id.in_(to_flag)).update({'is_chronically_absent': True}, synchronize_session=False)
+    if to_clear:
+        Student.query.filter(Student.id.in_(to_clear)).update({'is_chronically_absent': False}, synchronize_session=False)
+    return len(to_flag), len(to_clear)
+
+
+def refresh_chronic_absence_flags(student_ids):
+    """
+    Re-evaluates and commits the flags of `student_ids` after their attendance was
+    saved and committed. Errors are logged rather than raised, as the attendance
+    itself is already saved and the daily update_absence_flags run catches up.
+    """
+    try:
+        update_chronic_absence_flags(student_ids)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error refreshing chronic absence flags: {e}", exc_info=True)
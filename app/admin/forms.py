@@ -2,9 +2,9 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, TextAreaField, PasswordField, BooleanField, SubmitField, DateField, SelectField, ValidationError, TimeField, HiddenField
-from wtforms.validators import DataRequired, Length, Email, EqualTo, Optional, Regexp
+from wtforms.validators import DataRequired, InputRequired, Length, Email, EqualTo, Optional, Regexp
 from wtforms_sqlalchemy.fields import QuerySelectField, QuerySelectMultipleField 
-from app.models import Subject, User, Student, UserRole, SubjectClass # Import UserRole
+from app.models import Subject, User, Student, UserRole, SubjectClass, DAYS_OF_WEEK # Import UserRole
 from wtforms.fields import FieldList, FormField # Ensure these are imported
 
 # --- Helper functions ---
@@ -14,6 +14,9 @@ def get_all_subjects():
 def get_all_teachers():
     return User.query.filter_by(role=UserRole.TEACHER, is_active=True).order_by(User.last_name, User.first_name)
 
+def get_all_classes():
+    return SubjectClass.query.order_by(SubjectClass.name)
+
 def get_students_not_in_class(class_id_for_form):
     if not class_id_for_form: 
         return Student.query.filter_by(is_active=True).order_by(Student.last_name, Student.first_name)
@@ -109,16 +112,10 @@ class ScheduleEntryForm(FlaskForm):
     class Meta:
         csrf = False # Important for sub-forms in FieldList
 
-    day_of_week = SelectField('Day', choices=[
-        ("", "-- Select Day --"),
-        ("Monday", "Monday"),
-        ("Tuesday", "Tuesday"),
-        ("Wednesday", "Wednesday"),
-        ("Thursday", "Thursday"),
-        ("Friday", "Friday"),
-        ("Saturday", "Saturday"),
-        ("Sunday", "Sunday")
-    ], validators=[DataRequired(message="Please select a day.")])
+    # Stored as the weekday number (Monday == 0); "" is the placeholder and coerces to None
+    day_of_week = SelectField('Day', choices=[("", "-- Select Day --")] + [(str(day), name) for day, name in enumerate(DAYS_OF_WEEK)],
+                              coerce=lambda value: int(value) if value not in (None, "") else None,
+                              validators=[InputRequired(message="Please select a day.")])
     
     start_time = TimeField('Start Time', format='%H:%M', 
                            validators=[DataRequired(message="Please enter a start time.")])
@@ -263,3 +260,15 @@ class HolidayForm(FlaskForm):
     description = TextAreaField('Description (Optional)',
                                 validators=[Optional(), Length(max=500)])
     submit = SubmitField('Save Holiday')
+
+class ReportJobForm(FlaskForm):
+    report_type = SelectField('Report', validators=[DataRequired()]) # Choices set from pdf_reports.REPORT_TYPES in the view
+    subject_class = QuerySelectField('Class', query_factory=get_all_classes, get_label='name', allow_blank=False,
+                                     validators=[DataRequired(message="Please select a class.")])
+    start_date = DateField('From', format='%Y-%m-%d', validators=[Optional()])
+    end_date = DateField('To', format='%Y-%m-%d', validators=[Optional()])
+    submit = SubmitField('Queue Report')
+
+    def validate_end_date(self, field):
+        if field.data and self.start_date.data and field.data < self.start_date.data:
+            raise ValidationError("'To' date must not be before the 'From' date.")
@@ -1,23 +1,31 @@
 # app/admin/routes.py
-from flask import render_template, request, redirect, url_for, flash, abort, current_app, send_from_directory
+from flask import render_template, request, redirect, url_for, flash, abort, current_app, send_from_directory, jsonify
 from flask_login import login_required, current_user
 from wtforms.validators import DataRequired, Length, EqualTo 
 from . import admin # Blueprint
 from app import db 
 from app.decorators import staff_required, admin_required 
-from app.models import Subject, User, UserRole, Student, SubjectClass, Attendance, Holiday, ClassSchedule 
+from app.models import Subject, User, UserRole, Student, SubjectClass, Attendance, Holiday, ClassSchedule, ReportJob, DAYS_OF_WEEK
+from app.holiday_calendar import invalidate_holiday_calendar
+from app.schedule_resolver import invalidate_schedule_cache
+from app.schedule_clashes import make_interval, find_schedule_clashes, describe_clash, get_clash_index
+from app.attendance_export import attendance_records_csv, streamed_csv_response
+from app.attendance_analytics import get_attendance_analytics, ANALYTICS_GRANULARITIES
+from app.dashboard_stats import get_dashboard_stats
+from app.student_history import student_history_page, student_class_totals
+from app.conditional_get import invalidate_class_pages
+from app.pdf_reports import REPORT_TYPES, submit_report_job, get_reports_dir, weasyprint_available
 from app.admin.forms import (
     SubjectForm, TeacherForm, StudentForm, SubjectClassForm, 
     EnrollmentForm, StudentCSVImportForm, ClassCSVImportForm,
-    UserAdminForm, HolidayForm 
+    UserAdminForm, HolidayForm, ReportJobForm
 )
-from datetime import date, datetime, time 
+from datetime import date, datetime, time, timedelta 
 import pandas as pd 
 import io 
 from werkzeug.utils import secure_filename 
 import os
 import shutil
-from sqlalchemy import text # <<< ADD THIS IMPORT
 
 # --- Backup Directory ---
 BACKUP_DIR_NAME = 'db_backups'
@@ -31,28 +39,54 @@ def get_backup_dir():
 @login_required
 @staff_required 
 def admin_dashboard():
-    total_active_students = Student.query.filter_by(is_active=True).count()
-    total_teachers = User.query.filter_by(role=UserRole.TEACHER, is_active=True).count()
-    total_subjects = Subject.query.count()
-    total_classes = SubjectClass.query.count()
-    today = date.today() 
-    todays_attendance_records = Attendance.query.filter_by(date=today).all()
-    present_or_late_today = 0
-    total_records_today = len(todays_attendance_records)
-    for record in todays_attendance_records:
-        if record.status == 'present' or record.status == 'late':
-            present_or_late_today += 1
-    todays_attendance_rate = 0
-    if total_records_today > 0:
-        todays_attendance_rate = (present_or_late_today / total_records_today) * 100
-    stats = {
-        'total_active_students': total_active_students, 'total_teachers': total_teachers,
-        'total_subjects': total_subjects, 'total_classes': total_classes,
-        'todays_attendance_present_late_count': present_or_late_today,
-        'todays_attendance_total_records_count': total_records_today,
-        'todays_attendance_rate': round(todays_attendance_rate, 2)
-    }
-    return render_template('admin/dashboard.html', title='Admin Dashboard', stats=stats)
+    return render_template('admin/dashboard.html', title='Admin Dashboard', stats=get_dashboard_stats())
+
+@admin.route('/attendance/export.csv')
+@login_required
+@staff_required
+def export_school_attendance_csv():
+    """Every attendance record in the school for start_date..end_date (default: this year to date), streamed."""
+    today = date.today()
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else date(today.year, 1, 1)
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else today
+    except ValueError:
+        flash("Invalid export date range. Please use YYYY-MM-DD.", "warning")
+        return redirect(url_for('admin.admin_dashboard'))
+    return streamed_csv_response(
+        attendance_records_csv(start_date, end_date),
+        f"attendance_all_classes_{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}.csv"
+    )
+
+@admin.route('/analytics/attendance')
+@login_required
+@staff_required
+def attendance_analytics():
+    """
+    JSON attendance rates across classes for start_date..end_date (default: the last
+    30 days), grouped by ?granularity=day|class|subject|teacher (default: day).
+    The rate is (present + late) over present, late, absent and excused records.
+    """
+    today = date.today()
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ANALYTICS_GRANULARITIES:
+        return jsonify({'error': f"'granularity' must be one of: {', '.join(ANALYTICS_GRANULARITIES)}."}), 400
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else today - timedelta(days=29)
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else today
+    except ValueError:
+        return jsonify({'error': "'start_date' and 'end_date' must be in YYYY-MM-DD format."}), 400
+    if end_date < start_date:
+        return jsonify({'error': "'end_date' must not be before 'start_date'."}), 400
+
+    rows, from_cache = get_attendance_analytics(start_date, end_date, granularity)
+    return jsonify({
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'granularity': granularity,
+        'cached': from_cache,
+        'rows': rows,
+    })
 
 # --- Subject CRUD Routes ---
 @admin.route('/subjects')
@@ -94,6 +128,7 @@ def edit_subject(subject_id):
             subject.name = new_name
             subject.description = form.description.data
             db.session.commit()
+            invalidate_class_pages()
             flash('Subject updated successfully!', 'success')
             return redirect(url_for('admin.list_subjects'))
     return render_template('admin/subject_form.html', form=form, title="Edit Subject", legend=f"Edit Subject: {subject.name}", subject=subject)
@@ -164,6 +199,7 @@ def edit_teacher(user_id):
             teacher_user.set_password(form.password.data)
         try:
             db.session.commit()
+            invalidate_class_pages()
             flash(f'Teacher {teacher_user.first_name} {teacher_user.last_name} updated successfully!', 'success')
             return redirect(url_for('admin.list_teachers'))
         except Exception as e:
@@ -198,8 +234,12 @@ def delete_teacher(user_id):
 @login_required
 @staff_required
 def list_students():
-    students = Student.query.order_by(Student.last_name, Student.first_name).all()
-    return render_template('admin/students.html', students=students, title="Manage Students")
+    query = Student.query
+    chronic_only = request.args.get('chronically_absent') == '1'
+    if chronic_only:
+        query = query.filter(Student.is_chronically_absent == True)
+    students = query.order_by(Student.last_name, Student.first_name).all()
+    return render_template('admin/students.html', students=students, chronic_only=chronic_only, title="Manage Students")
 
 @admin.route('/students/add', methods=['GET', 'POST'])
 @login_required
@@ -244,6 +284,7 @@ def edit_student(student_id):
         student.is_in_arrears = form.is_in_arrears.data 
         try:
             db.session.commit()
+            invalidate_class_pages()
             flash(f'Student {student.first_name} {student.last_name} updated successfully!', 'success')
             return redirect(url_for('admin.list_students'))
         except Exception as e:
@@ -254,6 +295,42 @@ def edit_student(student_id):
                            legend=f"Edit Student: {student.first_name} {student.last_name}", 
                            student=student)
 
+@admin.route('/students/<int:student_id>/attendance')
+@login_required
+@staff_required
+def student_attendance_history(student_id):
+    """A student's attendance across all classes, newest first, one keyset page at a time (?cursor=)."""
+    student = Student.query.get_or_404(student_id)
+    cursor = request.args.get('cursor') or None
+    try:
+        records, next_cursor = student_history_page(student.id, current_app.config['STUDENT_HISTORY_PER_PAGE'], cursor)
+    except ValueError:
+        flash("Invalid page link. Showing the most recent records.", "warning")
+        return redirect(url_for('admin.student_attendance_history', student_id=student.id))
+    return render_template('admin/student_attendance_history.html', title="Attendance History", student=student,
+                           records=records, next_cursor=next_cursor, is_first_page=cursor is None,
+                           class_totals=student_class_totals(student.id))
+
+@admin.route('/students/<int:student_id>/attendance.json')
+@login_required
+@staff_required
+def student_attendance_history_json(student_id):
+    """JSON version of the history page: ?cursor= from the previous page's next_cursor, ?per_page= (capped)."""
+    student = Student.query.get_or_404(student_id)
+    try:
+        per_page = int(request.args.get('per_page', current_app.config['STUDENT_HISTORY_PER_PAGE']))
+        if per_page < 1:
+            raise ValueError
+        records, next_cursor = student_history_page(
+            student.id, min(per_page, current_app.config['STUDENT_HISTORY_MAX_PER_PAGE']), request.args.get('cursor') or None
+        )
+    except ValueError:
+        return jsonify({'error': "'per_page' must be a positive integer and 'cursor' a next_cursor value from a previous page."}), 400
+    response = {'student_id': student.id, 'records': records, 'next_cursor': next_cursor}
+    if not request.args.get('cursor'):
+        response['class_totals'] = student_class_totals(student.id)
+    return jsonify(response)
+
 @admin.route('/students/delete/<int:student_id>', methods=['POST'])
 @login_required
 @staff_required
@@ -282,15 +359,41 @@ def list_subject_classes():
         db.joinedload(SubjectClass.subject_taught), 
         db.joinedload(SubjectClass.teacher_user)
     ).order_by(SubjectClass.name.asc()).all()
-    # MODIFIED: Pass 'sa_text=text' to the template for sorting schedules
-    return render_template('admin/subject_classes.html', classes=classes, title="Manage Subject Classes", sa_text=text)
+    # Every class's schedules in one query, in weekday/time order (ix_class_schedules_class_day)
+    schedules_by_class = {}
+    for schedule in ClassSchedule.query.order_by(ClassSchedule.subject_class_id, ClassSchedule.day_of_week, ClassSchedule.start_time).all():
+        schedules_by_class.setdefault(schedule.subject_class_id, []).append(schedule)
+    return render_template('admin/subject_classes.html', classes=classes, title="Manage Subject Classes", schedules_by_class=schedules_by_class)
+
+def schedules_free_of_clashes(form, class_id=None):
+    """
+    Checks the form's schedule entries for room and teacher double-bookings, against
+    the saved timetable (other than the class's own sessions) and each other.
+    Clashes are added to the entries' start time errors. Returns True if there are none.
+    """
+    positions, intervals = [], []
+    teacher_user_id = form.teacher.data.id if form.teacher.data else None
+    for position, entry in enumerate(form.schedules.entries):
+        schedule_data = entry.form.data
+        if schedule_data['day_of_week'] is not None and schedule_data['start_time'] and schedule_data['end_time']:
+            positions.append(position)
+            intervals.append(make_interval(
+                schedule_data['day_of_week'], schedule_data['start_time'], schedule_data['end_time'], schedule_data.get('location'),
+                class_id, form.name.data, form.start_date.data, form.end_date.data, teacher_user_id
+            ))
+    clashes = find_schedule_clashes(intervals, exclude_class_id=class_id)
+    for interval_position, clash in clashes:
+        form.schedules.entries[positions[interval_position]].form.start_time.errors.append(describe_clash(clash))
+    if clashes:
+        flash('Some schedule slots clash with other classes. Nothing was saved.', 'danger')
+    return not clashes
 
 @admin.route('/classes/add', methods=['GET', 'POST'])
 @login_required
 @staff_required
 def add_subject_class():
     form = SubjectClassForm()
-    if form.validate_on_submit():
+    if form.validate_on_submit() and schedules_free_of_clashes(form):
         new_class = SubjectClass(
             name=form.name.data, 
             subject_id=form.subject.data.id,
@@ -302,7 +405,7 @@ def add_subject_class():
         db.session.add(new_class) 
         
         for schedule_entry_form_data in form.schedules.data:
-            if schedule_entry_form_data['day_of_week'] and \
+            if schedule_entry_form_data['day_of_week'] is not None and \
                schedule_entry_form_data['start_time'] and \
                schedule_entry_form_data['end_time']:
                 
@@ -317,6 +420,7 @@ def add_subject_class():
         
         try:
             db.session.commit() 
+            invalidate_schedule_cache()
             flash(f'Class "{new_class.name}" and its schedules added successfully!', 'success')
             return redirect(url_for('admin.list_subject_classes'))
         except Exception as e:
@@ -337,7 +441,7 @@ def edit_subject_class(class_id):
     subject_class = SubjectClass.query.get_or_404(class_id)
     form = SubjectClassForm(obj=subject_class)
 
-    if form.validate_on_submit():
+    if form.validate_on_submit() and schedules_free_of_clashes(form, class_id=subject_class.id):
         subject_class.name = form.name.data
         subject_class.subject_id = form.subject.data.id
         subject_class.teacher_user_id = form.teacher.data.id if form.teacher.data else None
@@ -353,7 +457,7 @@ def edit_subject_class(class_id):
             schedule_id_str = schedule_form_data.get('schedule_id')
             schedule_id = int(schedule_id_str) if schedule_id_str and schedule_id_str.isdigit() else None
 
-            if schedule_form_data['day_of_week'] and schedule_form_data['start_time'] and schedule_form_data['end_time']:
+            if schedule_form_data['day_of_week'] is not None and schedule_form_data['start_time'] and schedule_form_data['end_time']:
                 if schedule_id and schedule_id in existing_schedule_ids:
                     sched_to_update = ClassSchedule.query.get(schedule_id)
                     if sched_to_update:
@@ -384,6 +488,7 @@ def edit_subject_class(class_id):
         
         try:
             db.session.commit()
+            invalidate_schedule_cache()
             flash(f'Class "{subject_class.name}" and its schedules updated successfully!', 'success')
             return redirect(url_for('admin.list_subject_classes'))
         except Exception as e:
@@ -395,7 +500,7 @@ def edit_subject_class(class_id):
         while len(form.schedules.entries) > 0:
             form.schedules.pop_entry()
         if subject_class.schedules:
-            for schedule in subject_class.schedules.order_by(ClassSchedule.day_of_week, ClassSchedule.start_time).all(): # Simple sort for pre-population
+            for schedule in subject_class.schedules.order_by(ClassSchedule.day_of_week, ClassSchedule.start_time).all():
                 form.schedules.append_entry({
                     'schedule_id': schedule.id,
                     'day_of_week': schedule.day_of_week,
@@ -410,6 +515,16 @@ def edit_subject_class(class_id):
     return render_template('admin/subject_class_form.html', form=form, title="Edit Class",
                            legend=f"Edit Class: {subject_class.name}", subject_class=subject_class)
 
+@admin.route('/classes/clashes')
+@login_required
+@staff_required
+def schedule_clash_report():
+    clashes = get_clash_index().audit()
+    teacher_ids = {clash.interval.teacher_user_id for clash in clashes if clash.kind == 'teacher'}
+    teacher_names = {user.id: f"{user.first_name} {user.last_name}" for user in User.query.filter(User.id.in_(teacher_ids))} if teacher_ids else {}
+    return render_template('admin/schedule_clashes.html', title="Schedule Clashes", clashes=clashes,
+                           teacher_names=teacher_names, days_of_week=DAYS_OF_WEEK)
+
 @admin.route('/classes/delete/<int:class_id>', methods=['POST'])
 @login_required
 @staff_required
@@ -421,6 +536,7 @@ def delete_subject_class(class_id):
     try:
         db.session.delete(subject_class) 
         db.session.commit()
+        invalidate_schedule_cache()
         flash(f'Class "{subject_class.name}" deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -449,6 +565,7 @@ def manage_enrollments(class_id):
         if added_count > 0:
             try:
                 db.session.commit()
+                invalidate_class_pages()
                 flash(f'{added_count} student(s) enrolled in "{current_class.name}" successfully!', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -473,6 +590,7 @@ def unenroll_student(class_id, student_id):
         current_class.students_enrolled.remove(student_to_unenroll)
         try:
             db.session.commit()
+            invalidate_class_pages()
             flash(f'Student {student_to_unenroll.first_name} {student_to_unenroll.last_name} unenrolled from "{current_class.name}" successfully!', 'success')
         except Exception as e:
             db.session.rollback()
@@ -614,7 +732,9 @@ def import_classes_csv():
                     imported_count += 1
                 except Exception as e_row: skipped_count += 1; error_rows.append(f"Row {index+2}: Error processing row - {str(e_row)}")
             
-            if imported_count > 0: db.session.commit()
+            if imported_count > 0:
+                db.session.commit()
+                invalidate_schedule_cache()
             flash(f"Successfully imported {imported_count} classes. Skipped {skipped_count} rows.", "success" if imported_count > 0 else "info")
             if error_rows:
                 flash("Issues Encountered During Import:", "warning");
@@ -681,6 +801,52 @@ def download_backup(filename):
         flash(f"Error downloading backup: {str(e)}", "danger"); 
         return redirect(url_for('admin.backup_management'))
 
+# --- Background PDF Reports ---
+@admin.route('/reports', methods=['GET', 'POST'])
+@login_required
+@staff_required
+def report_jobs():
+    form = ReportJobForm()
+    form.report_type.choices = [(key, label) for key, (label, _template) in REPORT_TYPES.items()]
+    if form.validate_on_submit():
+        job = ReportJob(
+            report_type=form.report_type.data, subject_class_id=form.subject_class.data.id,
+            start_date=form.start_date.data, end_date=form.end_date.data,
+            status='queued', requested_by_user_id=current_user.id
+        )
+        try:
+            db.session.add(job)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error queuing report: {str(e)}', 'danger')
+            current_app.logger.error(f"Error queuing report job: {e}", exc_info=True)
+            return redirect(url_for('admin.report_jobs'))
+        try:
+            submit_report_job(job.id)
+            flash(f'Report #{job.id} queued. Refresh this page to check its progress.', 'success')
+        except Exception as e:
+            # The job stays queued; `flask run_report_jobs` will pick it up
+            flash(f'Report #{job.id} saved but could not be started now: {str(e)}', 'warning')
+            current_app.logger.error(f"Error starting report job {job.id}: {e}", exc_info=True)
+        return redirect(url_for('admin.report_jobs'))
+
+    jobs = ReportJob.query.options(db.joinedload(ReportJob.subject_class), db.joinedload(ReportJob.requested_by)
+                                   ).order_by(ReportJob.created_at.desc(), ReportJob.id.desc()).limit(100).all()
+    return render_template('admin/report_jobs.html', form=form, jobs=jobs, report_types=REPORT_TYPES,
+                           weasyprint_available=weasyprint_available(), title="PDF Reports")
+
+@admin.route('/reports/<int:job_id>/download')
+@login_required
+@staff_required
+def download_report(job_id):
+    job = ReportJob.query.get_or_404(job_id)
+    if job.status != 'completed' or not job.file_name:
+        flash(f'Report #{job.id} is not ready for download.', 'warning')
+        return redirect(url_for('admin.report_jobs'))
+    try: return send_from_directory(get_reports_dir(), job.file_name, as_attachment=True)
+    except FileNotFoundError: abort(404)
+
 # --- User Management Routes (Admin Level) ---
 # ... (User management routes remain the same) ...
 @admin.route('/users')
@@ -753,6 +919,7 @@ def edit_user_admin(user_id):
                 user_to_edit.set_password(form.password.data)
             try:
                 db.session.commit()
+                invalidate_class_pages()
                 flash(f'User {user_to_edit.username} updated successfully!', 'success')
                 return redirect(url_for('admin.list_all_users'))
             except Exception as e:
@@ -816,6 +983,7 @@ def add_holiday():
             try:
                 db.session.add(holiday)
                 db.session.commit()
+                invalidate_holiday_calendar()
                 flash('Holiday/Event added successfully!', 'success')
                 return redirect(url_for('admin.list_holidays'))
             except Exception as e:
@@ -843,6 +1011,7 @@ def edit_holiday(holiday_id):
         holiday.description = form.description.data
         try:
             db.session.commit()
+            invalidate_holiday_calendar()
             flash('Holiday/Event updated successfully!', 'success')
             return redirect(url_for('admin.list_holidays'))
         except Exception as e:
@@ -860,6 +1029,7 @@ def delete_holiday(holiday_id):
     try:
         db.session.delete(holiday)
         db.session.commit()
+        invalidate_holiday_calendar()
         flash(f'Holiday/Event "{holiday.name}" deleted successfully.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,93 @@
+# app/attendance_analytics.py
+"""
+School-wide attendance rates for a date range, grouped by day, class, subject or teacher.
+
+Each breakdown is one grouped SQL query over the DailyAttendanceRollup table
+(one row per class per date) rather than over attendance_records, so a year's
+trend reads a few thousand rollup rows. Results are cached per worker, keyed by
+(range, granularity). Each cached entry is checked against a cheap validator
+before use: the rollup row count and latest updated_at in the range, plus the
+class/schedule and class page generations, since moving a class to another
+subject or teacher, or renaming a subject or teacher, changes the groups or
+their labels without touching any attendance record.
+"""
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import DailyAttendanceRollup, SubjectClass, Subject, User
+from app.attendance_service import SUMMARY_COUNT_COLUMNS, SUMMARY_COUNT_FIELDS
+from app.cache_utils import current_generation
+from app.schedule_resolver import SCHEDULE_CACHE_NAME
+from app.conditional_get import CLASS_PAGES_CACHE_NAME
+
+ANALYTICS_GRANULARITIES = ('day', 'class', 'subject', 'teacher')
+ANALYTICS_CACHE_MAX_ENTRIES = 64
+# Holiday statuses are not sessions the student could attend, so they are left out of the rate
+ATTENDED_STATUSES = ('present', 'late')
+RATE_STATUSES = ('present', 'late', 'absent', 'excused')
+
+
+def _grouped_query(granularity):
+    """Returns (query, key_column, label_column) for one breakdown, before the date filter."""
+    counts = [func.sum(getattr(DailyAttendanceRollup, column)).label(column) for column in SUMMARY_COUNT_FIELDS]
+    if granularity == 'day':
+        return db.session.query(DailyAttendanceRollup.date, *counts), DailyAttendanceRollup.date, None
+    if granularity == 'class':
+        return db.session.query(SubjectClass.id, SubjectClass.name, *counts).join(
+            SubjectClass, DailyAttendanceRollup.subject_class_id == SubjectClass.id
+        ), SubjectClass.id, SubjectClass.name
+    if granularity == 'subject':
+        return db.session.query(Subject.id, Subject.name, *counts).join(
+            SubjectClass, DailyAttendanceRollup.subject_class_id == SubjectClass.id
+        ).join(Subject, SubjectClass.subject_id == Subject.id), Subject.id, Subject.name
+    teacher_name = func.coalesce(User.first_name + ' ' + User.last_name, User.username)
+    return db.session.query(SubjectClass.teacher_user_id, teacher_name, *counts).join(
+        SubjectClass, DailyAttendanceRollup.subject_class_id == SubjectClass.id
+    ).outerjoin(User, SubjectClass.teacher_user_id == User.id), SubjectClass.teacher_user_id, teacher_name
+
+
+def compute_attendance_analytics(start_date, end_date, granularity):
+    """Runs the grouped query and returns a list of row dicts ordered by key."""
+    query, key_column, label_column = _grouped_query(granularity)
+    query = query.filter(DailyAttendanceRollup.date >= start_date, DailyAttendanceRollup.date <= end_date)
+    group_columns = [key_column] if label_column is None else [key_column, label_column]
+    rows = []
+    for row in query.group_by(*group_columns).order_by(key_column):
+        values = dict(row._mapping)
+        counts = {status: values[column] or 0 for status, column in SUMMARY_COUNT_COLUMNS.items()}
+        rate_total = sum(counts[status] for status in RATE_STATUSES)
+        key = row[0]
+        rows.append({
+            'key': key.strftime('%Y-%m-%d') if granularity == 'day' else key,
+            'label': key.strftime('%Y-%m-%d') if granularity == 'day' else (row[1] or 'Unassigned'),
+            'counts': counts,
+            'total_records': values['total_count'] or 0,
+            'attendance_rate': round(sum(counts[status] for status in ATTENDED_STATUSES) / rate_total * 100, 2) if rate_total else None,
+        })
+    return rows
+
+
+def _range_validator(start_date, end_date):
+    row_count, last_updated = db.session.query(
+        func.count(DailyAttendanceRollup.id), func.max(DailyAttendanceRollup.updated_at)
+    ).filter(DailyAttendanceRollup.date >= start_date, DailyAttendanceRollup.date <= end_date).one()
+    return (row_count, last_updated, current_generation(SCHEDULE_CACHE_NAME), current_generation(CLASS_PAGES_CACHE_NAME))
+
+
+def get_attendance_analytics(start_date, end_date, granularity):
+    """Cached compute_attendance_analytics(). Returns (rows, served_from_cache)."""
+    cache = current_app.extensions.setdefault('attendance_analytics_cache', OrderedDict())
+    cache_key = (start_date, end_date, granularity)
+    validator = _range_validator(start_date, end_date)
+    cached = cache.get(cache_key)
+    if cached is not None and cached[0] == validator:
+        cache.move_to_end(cache_key)
+        return cached[1], True
+
+    rows = compute_attendance_analytics(start_date, end_date, granularity)
+    cache[cache_key] = (validator, rows)
+    cache.move_to_end(cache_key)
+    while len(cache) > ANALYTICS_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+    return rows, False
@@ -0,0 +1,128 @@
+# app/attendance_export.py
+"""
+Streaming CSV exports of attendance data.
+
+Each export is a generator of CSV text chunks meant to be wrapped in a streamed
+Response: rows are read from the database in batches (yield_per) and written out
+a few hundred at a time, so memory stays flat and the download starts straight
+away even for a whole-school, whole-year export. Text cells that a spreadsheet
+would evaluate as a formula (names, remarks) are written with a leading quote.
+"""
+import csv
+import io
+from itertools import chain
+from flask import Response, stream_with_context
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Attendance, Student, SubjectClass, Subject
+from app.attendance_matrix import build_attendance_matrix, student_keyset_page, MATRIX_STATUSES
+
+EXPORT_CHUNK_ROWS = 500 # CSV rows per chunk sent to the client
+EXPORT_YIELD_PER = 1000 # Rows fetched per database round trip
+MATRIX_EXPORT_STUDENTS_PER_PAGE = 500
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r') # Cell starts that Excel/Sheets evaluate (CSV injection)
+
+
+def _safe_cell(value):
+    """Prefixes text that a spreadsheet would run as a formula with a quote, so it is shown as text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(rows):
+    """Encodes an iterable of row sequences as CSV, yielding text every EXPORT_CHUNK_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+    for row in rows:
+        writer.writerow([_safe_cell(value) for value in row])
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def attendance_records_csv(start_date=None, end_date=None, subject_class_id=None):
+    """
+    One CSV line per attendance record, optionally limited to a date range and one
+    class. Records come out in (class, date) order, which the class/date index
+    serves directly, so the database never has to sort the whole range first.
+    """
+    header = ['Date', 'Session Time', 'Class', 'Subject', 'Student ID', 'First Name', 'Last Name', 'Status', 'Remarks']
+
+    def rows():
+        # Built on first iteration, i.e. in the streaming request's own session
+        query = db.session.query(
+            Attendance.date, Attendance.session_time, SubjectClass.name, Subject.name,
+            Student.student_id_number, Student.first_name, Student.last_name,
+            Attendance.status, Attendance.remarks
+        ).join(Student, Attendance.student_id == Student.id
+        ).join(SubjectClass, Attendance.subject_class_id == SubjectClass.id
+        ).join(Subject, SubjectClass.subject_id == Subject.id)
+        if subject_class_id is not None:
+            query = query.filter(Attendance.subject_class_id == subject_class_id)
+        if start_date:
+            query = query.filter(Attendance.date >= start_date)
+        if end_date:
+            query = query.filter(Attendance.date <= end_date)
+        query = query.order_by(Attendance.subject_class_id, Attendance.date, Attendance.id).yield_per(EXPORT_YIELD_PER)
+        for record_date, session_time, class_name, subject_name, student_id_number, first_name, last_name, status, remarks in query:
+            yield (record_date.strftime('%Y-%m-%d'), session_time.strftime('%H:%M') if session_time else '',
+                   class_name, subject_name, student_id_number, first_name, last_name, status, remarks or '')
+
+    return csv_chunks(chain([header], rows()))
+
+
+def class_report_csv(student_summaries):
+    """The class attendance report table; `student_summaries` as built for the report page."""
+    header = ['Student ID', 'First Name', 'Last Name', 'Sessions Recorded', 'Present', 'Absent', 'Late', 'Excused',
+              'Public Holiday', 'School Holiday', 'Attendance %']
+    rows = (
+        (summary['student_obj'].student_id_number, summary['student_obj'].first_name, summary['student_obj'].last_name,
+         summary['total_sessions_recorded'], summary['total_present'], summary['total_absent'], summary['total_late'],
+         summary['total_excused'], summary['total_public_holiday'], summary['total_school_holiday'],
+         '%.1f' % ((summary['total_present'] + summary['total_late']) / summary['total_sessions_recorded'] * 100)
+         if summary['total_sessions_recorded'] else '')
+        for summary in student_summaries
+    )
+    return csv_chunks(chain([header], rows))
+
+
+def attendance_matrix_csv(subject_class, session_dates):
+    """
+    The attendance matrix as CSV: one row per active enrolled student, one column
+    per session date, each cell the recorded status. Students are read a keyset
+    page at a time, with only that page's records loaded.
+    """
+    subject_class_id = subject_class.id
+
+    def rows():
+        # The view's session is gone once streaming starts, so reload the class in this one
+        subject_class = SubjectClass.query.get(subject_class_id)
+        yield ['Student ID', 'First Name', 'Last Name'] + [d.strftime('%Y-%m-%d') for d in session_dates]
+        after_id = None
+        while True:
+            students, _has_previous, has_next = student_keyset_page(
+                subject_class, MATRIX_EXPORT_STUDENTS_PER_PAGE, after_id=after_id
+            )
+            matrix = build_attendance_matrix(subject_class.id, students, session_dates, filter_students=True)
+            for student, status_codes in matrix.rows():
+                yield [student.student_id_number, student.first_name, student.last_name] + \
+                      [MATRIX_STATUSES[code].value for code in status_codes]
+            if not has_next:
+                break
+            after_id = students[-1].id
+
+    return csv_chunks(rows())
+
+
+def streamed_csv_response(chunks, filename):
+    """Wraps CSV chunks in a streamed download; the request context stays available while it streams."""
+    response = Response(stream_with_context(chunks), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{secure_filename(filename)}"'
+    return response
@@ -0,0 +1,101 @@
+# app/attendance_matrix.py
+"""
+Pivot engine for the attendance matrix views.
+
+Instead of building a dict per student keyed by date objects from full ORM rows,
+the matrix selects only (student_id, date, status) tuples and writes them into
+one dense bytearray with a small integer code per cell. The template walks the
+rows and looks each code up in MATRIX_STATUSES.
+
+Long date ranges are shown a window at a time: students are paged by keyset over
+(last_name, first_name, id) and session dates by column windows, and attendance
+is fetched only for the visible window.
+"""
+from collections import namedtuple
+from app import db
+from app.models import Attendance, Student, ATTENDANCE_STATUS_CHOICES
+
+MatrixStatus = namedtuple('MatrixStatus', ['value', 'letter', 'label'])
+
+NO_RECORD_CODE = 0
+# Indexed by status code: 0 is "no record", then one code per status choice, then a catch-all
+MATRIX_STATUSES = [MatrixStatus('', '-', 'No Record')] + [
+    MatrixStatus(value, 'H' if value.endswith('_holiday') else value[0].upper(), label)
+    for value, label in ATTENDANCE_STATUS_CHOICES
+] + [MatrixStatus('unknown', '?', 'Unknown Status')]
+UNKNOWN_STATUS_CODE = len(MATRIX_STATUSES) - 1
+STATUS_CODES = {status.value: code for code, status in enumerate(MATRIX_STATUSES[1:-1], start=1)}
+
+
+class AttendanceMatrix:
+    """Dense students x dates grid of status codes, one byte per cell, row-major."""
+
+    def __init__(self, students, dates):
+        self.students = students
+        self.dates = dates
+        self.codes = bytearray(len(students) * len(dates)) # Every cell starts as NO_RECORD_CODE
+
+    def rows(self):
+        """Yields (student, codes) per student; codes is a zero-copy view of that row."""
+        width = len(self.dates)
+        cells = memoryview(self.codes)
+        for index, student in enumerate(self.students):
+            yield student, cells[index * width:(index + 1) * width]
+
+
+def build_attendance_matrix(subject_class_id, students, dates, filter_students=False):
+    """
+    Builds the matrix for `students` (in display order) over the sorted session
+    `dates` of one class. Records are fetched with one query bounded by the first
+    and last date; records outside the given students or dates are ignored.
+    Pass filter_students=True for a short page of students to also restrict the
+    query to their ids. When a student has several sessions on one date, the
+    cell shows the latest session's status: records are read in (date,
+    session_time, id) order, a NULL session_time first, and later ones overwrite.
+    """
+    matrix = AttendanceMatrix(students, dates)
+    if not students or not dates:
+        return matrix
+
+    row_offsets = {student.id: index * len(dates) for index, student in enumerate(students)}
+    column_indexes = {session_date: index for index, session_date in enumerate(dates)}
+    records = db.session.query(Attendance.student_id, Attendance.date, Attendance.status).filter(
+        Attendance.subject_class_id == subject_class_id,
+        Attendance.date >= dates[0],
+        Attendance.date <= dates[-1]
+    )
+    if filter_students:
+        records = records.filter(Attendance.student_id.in_(list(row_offsets)))
+    records = records.order_by(Attendance.date, Attendance.session_time.asc().nulls_first(), Attendance.id)
+    codes = matrix.codes
+    for student_id, record_date, status in records:
+        row_offset = row_offsets.get(student_id)
+        column_index = column_indexes.get(record_date)
+        if row_offset is None or column_index is None:
+            continue
+        codes[row_offset + column_index] = STATUS_CODES.get(status, UNKNOWN_STATUS_CODE)
+    return matrix
+
+
+def student_keyset_page(subject_class, per_page, after_id=None, before_id=None):
+    """
+    One page of the class's active enrolled students in (last_name, first_name, id)
+    order. Pages are located by keyset from the student id at the edge of the
+    neighbouring page (after_id going forward, before_id going back) rather than by
+    OFFSET, so deep pages cost the same as the first.
+    Returns (students, has_previous, has_next).
+    """
+    sort_key = db.tuple_(Student.last_name, Student.first_name, Student.id)
+    query = subject_class.students_enrolled.filter(Student.is_active == True)
+    cursor = Student.query.get(before_id or after_id) if (before_id or after_id) else None
+
+    if cursor is not None and before_id:
+        students = query.filter(
+            sort_key < db.tuple_(cursor.last_name, cursor.first_name, cursor.id)
+        ).order_by(Student.last_name.desc(), Student.first_name.desc(), Student.id.desc()).limit(per_page + 1).all()
+        return list(reversed(students[:per_page])), len(students) > per_page, True
+
+    if cursor is not None:
+        query = query.filter(sort_key > db.tuple_(cursor.last_name, cursor.first_name, cursor.id))
+    students = query.order_by(Student.last_name, Student.first_name, Student.id).limit(per_page + 1).all()
+    return students[:per_page], cursor is not None, len(students) > per_page
@@ -0,0 +1,481 @@
+# app/attendance_service.py
+"""
+Set-based helpers for writing attendance records.
+
+Saving a whole attendance sheet used to cost one SELECT per student followed by
+row-by-row INSERT/UPDATEs. The helpers here load every existing record touched by
+a batch in a single query and then write the batch with one executemany INSERT
+and one executemany UPDATE, so the number of statements per submission stays
+constant regardless of class size.
+
+Every write also applies its status changes to the AttendanceSummary (per student
+and class) and DailyAttendanceRollup (per date and class) counts in the same
+transaction, so totals and trends never need a full scan of the records.
+Chronic-absence flags are left to the callers, which refresh them after
+committing (see app/absence_monitor.py).
+"""
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import bindparam, case, distinct, func
+from app import db
+from app.models import Attendance, AttendanceSummary, DailyAttendanceRollup, AttendanceSyncKey, SubjectClass, enrollments, ATTENDANCE_STATUS_CHOICES
+
+VALID_ATTENDANCE_STATUSES = frozenset(value for value, _label in ATTENDANCE_STATUS_CHOICES)
+REMARKS_MAX_LENGTH = 200
+IDEMPOTENCY_KEY_MAX_LENGTH = 64 # Matches AttendanceSyncKey.idempotency_key
+# AttendanceSummary column counting each status, e.g. 'present' -> 'present_count'
+SUMMARY_COUNT_COLUMNS = {value: f'{value}_count' for value, _label in ATTENDANCE_STATUS_CHOICES}
+SUMMARY_COUNT_FIELDS = list(SUMMARY_COUNT_COLUMNS.values()) + ['total_count']
+
+
+def _record_key(student_id, subject_class_id, record_date, session_time):
+    return (int(student_id), int(subject_class_id), record_date, session_time)
+
+
+def load_existing_attendance(keys):
+    """
+    Returns {record_key: (id, status, remarks)} for every existing Attendance row
+    matching one of the given (student_id, subject_class_id, date, session_time) keys.
+    Uses a single SELECT bounded by the classes and dates present in the batch.
+    """
+    if not keys:
+        return {}
+    class_ids = {key[1] for key in keys}
+    dates = {key[2] for key in keys}
+    student_ids = {key[0] for key in keys}
+
+    rows = db.session.query(
+        Attendance.id, Attendance.student_id, Attendance.subject_class_id,
+        Attendance.date, Attendance.session_time, Attendance.status, Attendance.remarks
+    ).filter(
+        Attendance.subject_class_id.in_(class_ids),
+        Attendance.date.in_(dates),
+        Attendance.student_id.in_(student_ids)
+    ).all()
+
+    existing = {}
+    for row in rows:
+        key = _record_key(row.student_id, row.subject_class_id, row.date, row.session_time)
+        if key in keys:
+            existing[key] = (row.id, row.status, row.remarks)
+    return existing
+
+
+def bulk_upsert_attendance(entries, recorded_by_user_id):
+    """
+    Inserts or updates many attendance records in one pass.
+
+    `entries` is an iterable of dicts with the keys student_id, subject_class_id,
+    date, status and optionally session_time and remarks. An entry without a
+    'remarks' key keeps the remarks already stored on the record; blank remarks are
+    stored as NULL. Later entries for the same record key win. Rows whose status and
+    remarks are unchanged are left alone ('' and NULL remarks count as the same).
+
+    The caller owns the transaction: nothing is committed here.
+    Returns a dict with 'created', 'updated' and 'unchanged' counts.
+    """
+    batch = {}
+    for entry in entries:
+        key = _record_key(entry['student_id'], entry['subject_class_id'], entry['date'], entry.get('session_time'))
+        batch[key] = entry
+
+    existing = load_existing_attendance(set(batch))
+    now = datetime.utcnow()
+    inserts = []
+    updates = []
+    unchanged = 0
+    summary_deltas = {}
+    rollup_deltas = {}
+
+    for key, entry in batch.items():
+        student_id, subject_class_id, record_date, session_time = key
+        status = entry['status']
+        remarks = entry.get('remarks') or None # A blank remarks field is stored as NULL
+        if key in existing:
+            record_id, old_status, old_remarks = existing[key]
+            old_remarks = old_remarks or None
+            if 'remarks' not in entry:
+                remarks = old_remarks
+            if old_status == status and old_remarks == remarks:
+                unchanged += 1
+                continue
+            if old_status != status:
+                for deltas in (summary_deltas.setdefault((student_id, subject_class_id), Counter()),
+                               rollup_deltas.setdefault((record_date, subject_class_id), Counter())):
+                    deltas[SUMMARY_COUNT_COLUMNS.get(old_status)] -= 1
+                    deltas[SUMMARY_COUNT_COLUMNS.get(status)] += 1
+            updates.append({
+                'id': record_id,
+                'status': status,
+                'remarks': remarks,
+                'recorded_by_user_id': recorded_by_user_id,
+                'updated_at': now,
+            })
+        else:
+            for deltas in (summary_deltas.setdefault((student_id, subject_class_id), Counter()),
+                           rollup_deltas.setdefault((record_date, subject_class_id), Counter())):
+                deltas[SUMMARY_COUNT_COLUMNS.get(status)] += 1
+                deltas['total_count'] += 1
+            inserts.append({
+                'student_id': student_id,
+                'subject_class_id': subject_class_id,
+                'date': record_date,
+                'session_time': session_time,
+                'status': status,
+                'remarks': remarks,
+                'recorded_by_user_id': recorded_by_user_id,
+                'created_at': now,
+                'updated_at': now,
+            })
+
+    if inserts:
+        # The ORM batches consecutive rows with the same set of non-NULL columns into
+        # one executemany, so group rows by which columns are NULL (e.g. session_time, remarks).
+        inserts.sort(key=lambda row: tuple(value is None for value in row.values()))
+        db.session.bulk_insert_mappings(Attendance, inserts)
+    if updates:
+        db.session.bulk_update_mappings(Attendance, updates)
+    apply_summary_deltas(summary_deltas)
+    apply_rollup_deltas(rollup_deltas)
+
+    return {'created': len(inserts), 'updated': len(updates), 'unchanged': unchanged}
+
+
+def _apply_count_deltas(model, key_columns, count_deltas):
+    """
+    Adds {key: Counter({column: delta})} to the `model` rows identified by the
+    `key_columns` values in each key, creating missing ones. Existing rows are
+    incremented in SQL with one executemany UPDATE, so concurrent writers never
+    overwrite each other's counts. Does not commit.
+    """
+    count_deltas = {
+        key: {column: deltas[column] for column in SUMMARY_COUNT_FIELDS}
+        for key, deltas in count_deltas.items()
+        if any(deltas[column] for column in SUMMARY_COUNT_FIELDS)
+    }
+    if not count_deltas:
+        return
+    table = model.__table__
+    key_filters = [table.c[column].in_({key[position] for key in count_deltas}) for position, column in enumerate(key_columns)]
+    existing_keys = set(db.session.query(*[table.c[column] for column in key_columns]).filter(*key_filters).all())
+
+    now = datetime.utcnow()
+    increments = []
+    inserts = []
+    for key, deltas in count_deltas.items():
+        key_values = dict(zip(key_columns, key))
+        if key in existing_keys:
+            increments.append(dict(
+                {f'delta_{column}': delta for column, delta in deltas.items()},
+                key_updated_at=now, **{f'key_{column}': value for column, value in key_values.items()}
+            ))
+        else:
+            inserts.append(dict(deltas, updated_at=now, **key_values))
+
+    if increments:
+        db.session.execute(
+            table.update().where(
+                *[table.c[column] == bindparam(f'key_{column}') for column in key_columns]
+            ).values(
+                updated_at=bindparam('key_updated_at'),
+                **{column: table.c[column] + bindparam(f'delta_{column}') for column in SUMMARY_COUNT_FIELDS}
+            ),
+            increments
+        )
+    if inserts:
+        db.session.bulk_insert_mappings(model, inserts)
+
+
+def apply_summary_deltas(summary_deltas):
+    """Adds {(student_id, subject_class_id): Counter({column: delta})} to the AttendanceSummary rows."""
+    _apply_count_deltas(AttendanceSummary, ('student_id', 'subject_class_id'), summary_deltas)
+
+
+def apply_rollup_deltas(rollup_deltas):
+    """Adds {(date, subject_class_id): Counter({column: delta})} to the DailyAttendanceRollup rows."""
+    _apply_count_deltas(DailyAttendanceRollup, ('date', 'subject_class_id'), rollup_deltas)
+
+
+def status_count_columns():
+    """SUM(CASE WHEN status = ... THEN 1 ELSE 0 END) per status, labelled like the AttendanceSummary columns."""
+    return [
+        func.sum(case((Attendance.status == status, 1), else_=0)).label(column)
+        for status, column in SUMMARY_COUNT_COLUMNS.items()
+    ] + [func.count(Attendance.id).label('total_count')]
+
+
+def _filter_date_range(query, start_date, end_date):
+    if start_date:
+        query = query.filter(Attendance.date >= start_date)
+    if end_date:
+        query = query.filter(Attendance.date <= end_date)
+    return query
+
+
+def aggregate_class_attendance(subject_class_id, start_date=None, end_date=None):
+    """
+    Counts each student's statuses in one class with a single GROUP BY query,
+    optionally limited to a date range (inclusive). Returns
+    {student_id: {column: count}} keyed by the AttendanceSummary column names.
+    """
+    query = db.session.query(Attendance.student_id, *status_count_columns()).filter(
+        Attendance.subject_class_id == subject_class_id
+    )
+    query = _filter_date_range(query, start_date, end_date).group_by(Attendance.student_id)
+    counts = {}
+    for row in query:
+        row_counts = dict(row._mapping)
+        counts[row_counts.pop('student_id')] = row_counts
+    return counts
+
+
+def build_class_report_summaries(class_id, enrolled_students, start_date=None, end_date=None):
+    """Per-student report rows (in enrolled_students order) for the class report page, its CSV export and PDF reports."""
+    if start_date or end_date:
+        # Counts for a date range are computed in the database with one GROUP BY query
+        counts_by_student = aggregate_class_attendance(class_id, start_date, end_date)
+    else:
+        # All-time totals come from the incrementally maintained summary table: one row per student
+        counts_by_student = {
+            summary.student_id: {column: getattr(summary, column) for column in SUMMARY_COUNT_FIELDS}
+            for summary in AttendanceSummary.query.filter_by(subject_class_id=class_id)
+        }
+
+    student_summary_data = []
+    for student in enrolled_students:
+        counts = counts_by_student.get(student.id, {})
+        student_summary_data.append({
+            'student_obj': student,
+            'total_present': counts.get('present_count', 0),
+            'total_absent': counts.get('absent_count', 0),
+            'total_late': counts.get('late_count', 0),
+            'total_excused': counts.get('excused_count', 0),
+            'total_public_holiday': counts.get('public_holiday_count', 0),
+            'total_school_holiday': counts.get('school_holiday_count', 0),
+            'total_sessions_recorded': counts.get('total_count', 0)
+        })
+    return student_summary_data
+
+
+def count_recorded_session_dates(subject_class_id, start_date=None, end_date=None):
+    """Number of distinct dates with at least one attendance record for the class."""
+    query = db.session.query(func.count(distinct(Attendance.date))).filter(
+        Attendance.subject_class_id == subject_class_id
+    )
+    return _filter_date_range(query, start_date, end_date).scalar()
+
+
+def rebuild_attendance_summaries():
+    """
+    Recomputes every AttendanceSummary row from attendance_records with one grouped
+    query. Returns the number of summary rows written. Does not commit.
+    """
+    grouped = db.session.query(
+        Attendance.student_id, Attendance.subject_class_id, *status_count_columns()
+    ).group_by(Attendance.student_id, Attendance.subject_class_id).all()
+
+    now = datetime.utcnow()
+    AttendanceSummary.query.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(AttendanceSummary, [dict(row._mapping, updated_at=now) for row in grouped])
+    return len(grouped)
+
+
+def rebuild_daily_rollup(start_date=None, end_date=None):
+    """
+    Recomputes the DailyAttendanceRollup rows for start_date..end_date (default:
+    every date) from attendance_records with one grouped query. Returns the number
+    of rollup rows written. Does not commit.
+    """
+    grouped = _filter_date_range(db.session.query(
+        Attendance.date, Attendance.subject_class_id, *status_count_columns()
+    ), start_date, end_date).group_by(Attendance.date, Attendance.subject_class_id).all()
+
+    now = datetime.utcnow()
+    stale = DailyAttendanceRollup.query
+    if start_date:
+        stale = stale.filter(DailyAttendanceRollup.date >= start_date)
+    if end_date:
+        stale = stale.filter(DailyAttendanceRollup.date <= end_date)
+    stale.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(DailyAttendanceRollup, [dict(row._mapping, updated_at=now) for row in grouped])
+    return len(grouped)
+
+
+def parse_attendance_sheet(form_data, student_ids):
+    """
+    Reads the plain 'status-<student_id>' / 'remarks-<student_id>' fields posted by
+    the attendance sheet for the given students, validating every row in one pass.
+
+    Students without a status field in the submission (e.g. enrolled after the page
+    was loaded) are skipped. Returns (rows, errors): rows maps student_id to
+    {'status', 'remarks'}; errors maps student_id to {field_name: message}.
+    """
+    rows = {}
+    errors = {}
+    for student_id in student_ids:
+        status = form_data.get(f'status-{student_id}')
+        if status is None:
+            continue
+        remarks = form_data.get(f'remarks-{student_id}', '').strip()
+        row_errors = {}
+        if status not in VALID_ATTENDANCE_STATUSES:
+            row_errors['status'] = 'Please select a status.' if not status else 'Not a valid choice.'
+        if len(remarks) > REMARKS_MAX_LENGTH:
+            row_errors['remarks'] = f'Remarks must be at most {REMARKS_MAX_LENGTH} characters.'
+        if row_errors:
+            errors[student_id] = row_errors
+        rows[student_id] = {'status': status, 'remarks': remarks}
+    return rows, errors
+
+
+def _parse_entry(raw):
+    """Parses one JSON entry into the dict shape used by bulk_upsert_attendance. Returns (entry, errors)."""
+    errors = []
+    if not isinstance(raw, dict):
+        return None, ['Entry must be a JSON object.']
+
+    parsed = {}
+    for field in ('class_id', 'student_id'):
+        value = raw.get(field)
+        if isinstance(value, bool) or not isinstance(value, int):
+            errors.append(f"'{field}' must be an integer.")
+        else:
+            parsed[field] = value
+
+    try:
+        parsed['date'] = datetime.strptime(str(raw.get('date')), '%Y-%m-%d').date()
+    except ValueError:
+        errors.append("'date' must be in YYYY-MM-DD format.")
+
+    session_time_raw = raw.get('session_time')
+    parsed['session_time'] = None
+    if session_time_raw not in (None, ''):
+        for time_format in ('%H:%M', '%H:%M:%S'):
+            try:
+                parsed['session_time'] = datetime.strptime(str(session_time_raw), time_format).time()
+                break
+            except ValueError:
+                continue
+        else:
+            errors.append("'session_time' must be in HH:MM format or null.")
+
+    status = raw.get('status')
+    if status not in VALID_ATTENDANCE_STATUSES:
+        errors.append(f"'status' must be one of: {', '.join(sorted(VALID_ATTENDANCE_STATUSES))}.")
+
+    remarks = raw.get('remarks')
+    if remarks is not None and not isinstance(remarks, str):
+        errors.append("'remarks' must be a string or null.")
+    elif remarks and len(remarks) > REMARKS_MAX_LENGTH:
+        errors.append(f"'remarks' must be at most {REMARKS_MAX_LENGTH} characters.")
+
+    if errors:
+        return None, errors
+    return {
+        'student_id': parsed['student_id'],
+        'subject_class_id': parsed['class_id'],
+        'date': parsed['date'],
+        'session_time': parsed['session_time'],
+        'status': status,
+        'remarks': remarks or None,
+    }, []
+
+
+def validate_attendance_entries(raw_entries, user):
+    """
+    Validates a batch of raw (JSON-decoded) attendance entries for `user`.
+
+    Field checks run per entry; class existence, the user's permission on each
+    class and enrollment of each student are checked in bulk with one query each.
+    Returns (entries, errors) where `entries` maps the input index to a parsed entry
+    and `errors` maps the input index to a list of messages.
+    """
+    entries = {}
+    errors = {}
+    for index, raw in enumerate(raw_entries):
+        entry, entry_errors = _parse_entry(raw)
+        if entry_errors:
+            errors[index] = entry_errors
+        else:
+            entries[index] = entry
+
+    class_ids = {entry['subject_class_id'] for entry in entries.values()}
+    student_ids = {entry['student_id'] for entry in entries.values()}
+    classes_by_id = {}
+    enrolled_pairs = set()
+    if class_ids:
+        classes_by_id = {sc.id: sc for sc in SubjectClass.query.filter(SubjectClass.id.in_(class_ids))}
+        enrolled_pairs = set(db.session.query(enrollments.c.student_id, enrollments.c.class_id).filter(
+            enrollments.c.class_id.in_(class_ids),
+            enrollments.c.student_id.in_(student_ids)
+        ).all())
+
+    for index, entry in list(entries.items()):
+        subject_class = classes_by_id.get(entry['subject_class_id'])
+        if subject_class is None:
+            errors[index] = [f"Class {entry['subject_class_id']} does not exist."]
+        elif not user.can_manage_class(subject_class):
+            errors[index] = [f"You are not authorized to mark attendance for class {subject_class.id}."]
+        elif (entry['student_id'], entry['subject_class_id']) not in enrolled_pairs:
+            errors[index] = [f"Student {entry['student_id']} is not enrolled in class {subject_class.id}."]
+        else:
+            continue
+        del entries[index]
+
+    return entries, errors
+
+
+def apply_sync_batch(mutations, user):
+    """
+    Applies a batch of queued offline mutations for `user`, skipping any whose
+    idempotency key has already been applied.
+
+    Each mutation is an attendance entry (see _parse_entry) plus an 'idempotency_key'.
+    Unlike the batch API, validation is per item: valid mutations are applied and
+    their keys recorded in one transaction, invalid ones are reported and skipped.
+    The caller commits. Returns a list of per-item result dicts in input order.
+    """
+    results = [None] * len(mutations)
+    keys_by_index = {}
+    for index, mutation in enumerate(mutations):
+        key = mutation.get('idempotency_key') if isinstance(mutation, dict) else None
+        if not isinstance(key, str) or not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            results[index] = {'idempotency_key': key, 'status': 'rejected',
+                              'errors': [f"'idempotency_key' must be a non-empty string of at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters."]}
+        else:
+            keys_by_index[index] = key
+
+    seen_keys = set()
+    if keys_by_index:
+        seen_keys = {row.idempotency_key for row in db.session.query(AttendanceSyncKey.idempotency_key).filter(
+            AttendanceSyncKey.user_id == user.id,
+            AttendanceSyncKey.idempotency_key.in_(set(keys_by_index.values()))
+        )}
+
+    pending_indexes = [index for index, key in keys_by_index.items() if key not in seen_keys]
+    entries, errors = validate_attendance_entries([mutations[index] for index in pending_indexes], user)
+    accepted = {}
+    for position, index in enumerate(pending_indexes):
+        key = keys_by_index[index]
+        if position in errors:
+            results[index] = {'idempotency_key': key, 'status': 'rejected', 'errors': errors[position]}
+        elif key in seen_keys:
+            results[index] = {'idempotency_key': key, 'status': 'duplicate'}
+        else:
+            seen_keys.add(key) # Only once accepted, so a retry after a rejected copy is still applied
+            accepted[index] = entries[position]
+    for index, key in keys_by_index.items():
+        if results[index] is None and index not in accepted:
+            results[index] = {'idempotency_key': key, 'status': 'duplicate'} # Applied by an earlier batch
+
+    applied_indexes = list(accepted)
+    if applied_indexes:
+        bulk_upsert_attendance(accepted.values(), recorded_by_user_id=user.id)
+        now = datetime.utcnow()
+        db.session.bulk_insert_mappings(AttendanceSyncKey, [
+            {'user_id': user.id, 'idempotency_key': keys_by_index[index], 'created_at': now}
+            for index in applied_indexes
+        ])
+    for index in applied_indexes:
+        results[index] = {'idempotency_key': keys_by_index[index], 'status': 'applied'}
+    return results
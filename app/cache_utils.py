@@ -0,0 +1,49 @@
+# app/cache_utils.py
+"""
+Cross-worker invalidation for per-process caches.
+
+Every gunicorn worker keeps its own in-memory caches. Each cache is tied to a named
+"generation" stamp file in the instance folder: writers call bump_generation()
+after committing a change, and readers rebuild their copy whenever the stamp no
+longer matches the one it was built from. Reading a stamp is one small file read,
+far cheaper than the queries the caches replace.
+"""
+import os
+import uuid
+from flask import current_app
+
+CACHE_STAMP_DIR_NAME = 'cache'
+
+def _stamp_path(name):
+    return os.path.join(current_app.instance_path, CACHE_STAMP_DIR_NAME, f'{name}.stamp')
+
+def current_generation(name):
+    try:
+        with open(_stamp_path(name)) as stamp_file:
+            return stamp_file.read()
+    except FileNotFoundError:
+        return ''
+
+def bump_generation(name):
+    """Marks every worker's cache called `name` as stale."""
+    path = _stamp_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as stamp_file:
+        stamp_file.write(uuid.uuid4().hex)
+    os.replace(tmp_path, path) # Atomic, so readers never see a half-written stamp
+
+def get_cached(name, builder, key=None):
+    """
+    Returns this worker's cached value for `name`, calling builder() to (re)build it
+    when the generation stamp has changed. Caches are stored per app instance.
+    `key` tells apart several caches invalidated by the same generation.
+    """
+    caches = current_app.extensions.setdefault('generation_caches', {})
+    cache_key = name if key is None else (name, key)
+    generation = current_generation(name) # Read before building so a concurrent bump is never missed
+    cached = caches.get(cache_key)
+    if cached is None or cached[0] != generation:
+        cached = (generation, builder())
+        caches[cache_key] = cached
+    return cached[1]
@@ -0,0 +1,219 @@
+# app/calendar_feeds.py
+"""
+iCalendar (.ics) timetable feeds per teacher, class and room.
+
+Each feed lists one event per session from CALENDAR_FEED_PAST_DAYS ago to
+CALENDAR_FEED_FUTURE_DAYS ahead, expanded from the classes' ClassSchedule rows
+by the schedule resolver: sessions stay within each class's start/end dates and
+holidays are skipped. Times are written as floating local times, i.e. shown at
+the same clock time the school uses.
+
+Calendar apps cannot log in, so a feed URL carries a token signed with the
+app's SECRET_KEY naming the user it was issued to, that user's
+calendar_feed_version, and what it shows ('teacher', 'class' or 'room' and
+which one). On every request the owner must still be active, on the same
+version and allowed to see that feed, so deactivating a user, moving a class to
+another teacher or a role change ends their URLs, and User.revoke_calendar_feeds()
+(the "Reset links" button, or `flask revoke_calendar_feeds`) ends them at will.
+Rotating SECRET_KEY revokes every URL.
+
+A built feed is kept per worker with a strong ETag (a hash of its body) until
+the 'schedules', 'holidays' or 'class_pages' generation changes or the day
+rolls over, so a calendar polling every few minutes costs a signature check,
+an owner lookup, three stamp reads and usually a 304.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from app.models import ClassSchedule, SubjectClass, User, UserRole
+from app.cache_utils import current_generation
+from app.holiday_calendar import HOLIDAY_CACHE_NAME
+from app.schedule_resolver import SCHEDULE_CACHE_NAME, get_class_schedule
+from app.schedule_clashes import room_key
+from app.conditional_get import CLASS_PAGES_CACHE_NAME
+
+FEED_KINDS = ('teacher', 'class', 'room')
+FEED_TOKEN_SALT = 'calendar-feed'
+FEED_UID_DOMAIN = 'attendance-tracker'
+ICS_LINE_LIMIT = 75 # Octets per line before folding (RFC 5545)
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=FEED_TOKEN_SALT)
+
+
+def feed_token(user, kind, key):
+    """Signed token for `user`'s URL of the feed of teacher/class `key` (a user or class id) or room `key` (a room_key())."""
+    return _serializer().dumps([user.id, user.calendar_feed_version, kind, key])
+
+
+def parse_feed_token(token):
+    """
+    (owner user id, feed version, kind, key) from a feed token. Raises
+    itsdangerous.BadSignature if it was not issued by this app or predates owners.
+    """
+    payload = _serializer().loads(token)
+    if not isinstance(payload, list) or len(payload) != 4:
+        raise BadSignature('Calendar feed token without an owner.')
+    owner_id, version, kind, key = payload
+    return owner_id, version, kind, key
+
+
+def can_view_feed(user, kind, key):
+    """Staff and admins can see every feed; teachers their own timetable and the classes they teach."""
+    if user.is_admin or user.is_staff:
+        return kind in FEED_KINDS
+    if kind == 'teacher':
+        return user.is_teacher and user.id == key
+    if kind == 'class':
+        subject_class = SubjectClass.query.get(key)
+        return subject_class is not None and user.can_manage_class(subject_class)
+    return False
+
+
+def authorize_feed_token(token):
+    """
+    (kind, key) of the feed a token shows, or None if the token is forged, its
+    owner is inactive or has reset their links, or the owner may no longer see it.
+    """
+    try:
+        owner_id, version, kind, key = parse_feed_token(token)
+    except BadSignature:
+        return None
+    owner = User.query.filter_by(id=owner_id, calendar_feed_version=version, is_active=True).first()
+    if owner is None or not can_view_feed(owner, kind, key):
+        return None
+    return kind, key
+
+
+def list_rooms():
+    """(room key, display name) for every room used by a schedule, by name."""
+    rooms = {}
+    for (location,) in ClassSchedule.query.with_entities(ClassSchedule.location).filter(ClassSchedule.location.isnot(None)).distinct():
+        key = room_key(location)
+        if key:
+            rooms.setdefault(key, location.strip())
+    return sorted(rooms.items(), key=lambda room: room[1].casefold())
+
+
+def _feed_classes(kind, key):
+    """(calendar name, classes in the feed) or None if the teacher, class or room no longer exists."""
+    if kind == 'teacher':
+        teacher = User.query.filter_by(id=key, role=UserRole.TEACHER, is_active=True).first()
+        if teacher is None:
+            return None
+        return f"{teacher.first_name} {teacher.last_name} - Timetable", SubjectClass.query.filter_by(teacher_user_id=teacher.id).all()
+    if kind == 'class':
+        subject_class = SubjectClass.query.get(key)
+        if subject_class is None:
+            return None
+        return f"{subject_class.name} - Timetable", [subject_class]
+    if kind == 'room':
+        rooms = dict(list_rooms())
+        if key not in rooms:
+            return None
+        class_ids = {class_id for class_id, location in ClassSchedule.query.with_entities(
+            ClassSchedule.subject_class_id, ClassSchedule.location).filter(ClassSchedule.location.isnot(None)) if room_key(location) == key}
+        return f"{rooms[key]} - Timetable", SubjectClass.query.filter(SubjectClass.id.in_(class_ids)).all()
+    return None
+
+
+def _escape_text(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Splits a content line into CRLF + space continuations of at most ICS_LINE_LIMIT octets."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= ICS_LINE_LIMIT:
+        return line
+    parts, current = [], ''
+    for char in line:
+        limit = ICS_LINE_LIMIT if not parts else ICS_LINE_LIMIT - 1 # Continuation lines start with a space
+        if len((current + char).encode('utf-8')) > limit:
+            parts.append(current)
+            current = ''
+        current += char
+    parts.append(current)
+    return '\r\n '.join(parts)
+
+
+def _session_event(subject_class, session, dtstamp):
+    subject_name = subject_class.subject_taught.name if subject_class.subject_taught else None
+    teacher = subject_class.teacher_user
+    description = '\n'.join(filter(None, [
+        f"Subject: {subject_name}" if subject_name else None,
+        f"Teacher: {teacher.first_name} {teacher.last_name}" if teacher else None,
+    ]))
+    if session.start_time is None: # Legacy schedule_details: the day is known, the time is not
+        uid_part = f"{session.date:%Y%m%d}"
+        timing = [f"DTSTART;VALUE=DATE:{session.date:%Y%m%d}", f"DTEND;VALUE=DATE:{session.date + timedelta(days=1):%Y%m%d}"]
+    else:
+        start = datetime.combine(session.date, session.start_time)
+        end = datetime.combine(session.date, session.end_time)
+        if end <= start:
+            end += timedelta(days=1) # Runs past midnight
+        uid_part = f"{start:%Y%m%dT%H%M}"
+        timing = [f"DTSTART:{start:%Y%m%dT%H%M%S}", f"DTEND:{end:%Y%m%dT%H%M%S}"]
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:class{subject_class.id}-{uid_part}@{FEED_UID_DOMAIN}",
+        f"DTSTAMP:{dtstamp}",
+    ] + timing + [f"SUMMARY:{_escape_text(subject_class.name)}"]
+    if session.location:
+        lines.append(f"LOCATION:{_escape_text(session.location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{_escape_text(description)}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def build_feed(kind, key, today):
+    """The feed's iCalendar text, or None if what it shows no longer exists."""
+    feed = _feed_classes(kind, key)
+    if feed is None:
+        return None
+    calendar_name, classes = feed
+    window_start = today - timedelta(days=current_app.config['CALENDAR_FEED_PAST_DAYS'])
+    window_end = today + timedelta(days=current_app.config['CALENDAR_FEED_FUTURE_DAYS'])
+    dtstamp = f"{today:%Y%m%d}T000000Z" # Same for every worker, so each serves the same body and ETag
+
+    sessions = []
+    for subject_class in classes:
+        for session in get_class_schedule(subject_class).sessions_between(window_start, window_end):
+            if kind != 'room' or room_key(session.location) == key:
+                sessions.append((subject_class, session))
+    sessions.sort(key=lambda item: (item[1].date, item[1].start_time is not None, item[1].start_time, item[0].name))
+
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//TFA Johor Bahru//Attendance Tracker//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape_text(calendar_name)}",
+    ]
+    for subject_class, session in sessions:
+        lines.extend(_session_event(subject_class, session, dtstamp))
+    lines.append("END:VCALENDAR")
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def get_feed(kind, key):
+    """
+    (body, etag) for the feed from this worker's cache, rebuilt when schedules,
+    holidays or names change or on a new day. None if the feed no longer exists.
+    """
+    stamp = (date.today(),) + tuple(current_generation(name) for name in (SCHEDULE_CACHE_NAME, HOLIDAY_CACHE_NAME, CLASS_PAGES_CACHE_NAME))
+    cache = current_app.extensions.setdefault('calendar_feeds', {})
+    cached = cache.get((kind, key))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    body = build_feed(kind, key, stamp[0])
+    feed = (body, hashlib.sha1(body.encode('utf-8')).hexdigest()) if body is not None else None
+    if any(entry[0] != stamp for entry in cache.values()):
+        cache.clear() # Every other feed was built from the same, now stale, data
+    cache[(kind, key)] = (stamp, feed)
+    return feed
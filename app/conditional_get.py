@@ -0,0 +1,85 @@
+# app/conditional_get.py
+"""
+Conditional GET support for the class report and attendance matrix pages.
+
+Before building one of these pages, the view computes a cheap validator and
+derives an ETag from it. If the browser already holds that version of the page
+(If-None-Match), a bodiless 304 Not Modified is returned instead of rendering.
+
+The validator covers everything the pages show:
+- the class's attendance records for the range (record count and latest
+  updated_at), which change with every record written. The rollup rows are not
+  enough: a write whose status changes cancel out (two students swapping
+  statuses) leaves their counts and updated_at as they were;
+- the 'schedules' and 'holidays' generations (session dates, class details);
+- the 'class_pages' generation, bumped by admin edits to students, enrollments,
+  subjects and users (names, rosters, the navigation bar's role);
+- the URL, the user and today's date, which shape the page and its defaults.
+
+Responses carry 'Cache-Control: private, no-cache', so browsers keep the page
+but revalidate on every load.
+"""
+import hashlib
+from datetime import date
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func
+from app import db
+from app.models import Attendance
+from app.cache_utils import current_generation, bump_generation
+from app.holiday_calendar import HOLIDAY_CACHE_NAME
+from app.schedule_resolver import SCHEDULE_CACHE_NAME
+
+CLASS_PAGES_CACHE_NAME = 'class_pages'
+
+
+def invalidate_class_pages():
+    """Call after committing changes to students, enrollments, subjects or users shown on class pages."""
+    bump_generation(CLASS_PAGES_CACHE_NAME)
+
+
+def class_attendance_validator(subject_class_id, start_date=None, end_date=None):
+    """
+    (records, latest update) for the class, optionally within start_date..end_date.
+    One range scan of ix_attendance_records_class_date.
+    """
+    query = db.session.query(func.count(Attendance.id), func.max(Attendance.updated_at)).filter(
+        Attendance.subject_class_id == subject_class_id
+    )
+    if start_date:
+        query = query.filter(Attendance.date >= start_date)
+    if end_date:
+        query = query.filter(Attendance.date <= end_date)
+    return tuple(query.one())
+
+
+def page_etag(*parts):
+    """ETag for the requested URL given `parts` (its validator), as seen by the current user today."""
+    key = (
+        request.full_path, current_user.get_id(), date.today(),
+        current_generation(CLASS_PAGES_CACHE_NAME), current_generation(SCHEDULE_CACHE_NAME),
+        current_generation(HOLIDAY_CACHE_NAME),
+    ) + parts
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def _set_cache_headers(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+def not_modified_response(etag):
+    """
+    A 304 response if the request's If-None-Match already holds `etag`, else None.
+    Never 304 while flashed messages are waiting: the page has to render to show them.
+    """
+    if session.get('_flashes') or not request.if_none_match.contains(etag):
+        return None
+    return _set_cache_headers(current_app.response_class(status=304), etag)
+
+
+def with_etag(body, etag):
+    """Wraps a rendered page in a response carrying its ETag and revalidation headers."""
+    return _set_cache_headers(make_response(body), etag)
@@ -0,0 +1,55 @@
+# app/dashboard_stats.py
+"""
+Headline numbers for the admin dashboard.
+
+All of them come from one aggregate SELECT over today's attendance records, with
+a conditional count for present/late and the four totals as scalar subqueries,
+so no records are loaded.
+The dashboard is reloaded constantly while staff are on it, so the result is
+also kept per worker for ADMIN_DASHBOARD_STATS_TTL seconds.
+"""
+import time
+from datetime import date
+from flask import current_app
+from sqlalchemy import case, func
+from app import db
+from app.models import Attendance, Student, Subject, SubjectClass, User, UserRole
+from app.attendance_analytics import ATTENDED_STATUSES
+
+
+def compute_dashboard_stats(today):
+    row = db.session.query(
+        db.session.query(func.count(Student.id)).filter(Student.is_active == True).scalar_subquery(),
+        db.session.query(func.count(User.id)).filter(User.role == UserRole.TEACHER, User.is_active == True).scalar_subquery(),
+        db.session.query(func.count(Subject.id)).scalar_subquery(),
+        db.session.query(func.count(SubjectClass.id)).scalar_subquery(),
+        func.count(Attendance.id),
+        func.sum(case((Attendance.status.in_(ATTENDED_STATUSES), 1), else_=0)),
+    ).filter(Attendance.date == today).one()
+    total_active_students, total_teachers, total_subjects, total_classes, total_records_today, present_or_late_today = row
+    present_or_late_today = present_or_late_today or 0
+
+    todays_attendance_rate = 0
+    if total_records_today > 0:
+        todays_attendance_rate = (present_or_late_today / total_records_today) * 100
+    return {
+        'total_active_students': total_active_students, 'total_teachers': total_teachers,
+        'total_subjects': total_subjects, 'total_classes': total_classes,
+        'todays_attendance_present_late_count': present_or_late_today,
+        'todays_attendance_total_records_count': total_records_today,
+        'todays_attendance_rate': round(todays_attendance_rate, 2)
+    }
+
+
+def get_dashboard_stats():
+    """compute_dashboard_stats() for today, reused for ADMIN_DASHBOARD_STATS_TTL seconds (0 disables caching)."""
+    today = date.today()
+    ttl = current_app.config['ADMIN_DASHBOARD_STATS_TTL']
+    cached = current_app.extensions.get('admin_dashboard_stats')
+    now = time.monotonic()
+    if cached is not None and cached[0] == today and now < cached[1]:
+        return cached[2]
+    stats = compute_dashboard_stats(today)
+    if ttl > 0:
+        current_app.extensions['admin_dashboard_stats'] = (today, now + ttl, stats)
+    return stats
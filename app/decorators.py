@@ -1,9 +1,9 @@
 # app/decorators.py
 
 from functools import wraps
-from flask import flash, redirect, url_for, abort, request # Added request for redirect next
+from flask import flash, redirect, url_for, abort, request, jsonify, g # Added request for redirect next
 from flask_login import current_user
-from app.models import UserRole # Assuming UserRole enum is in app.models
+from app.models import UserRole, User # Assuming UserRole enum is in app.models
 
 def role_required(role):
     """
@@ -98,3 +98,21 @@ def staff_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def api_token_required(f):
+    """
+    Decorator for JSON API routes used by tablets and integrations.
+    Authenticates with an 'Authorization: Bearer <token>' header instead of the
+    session cookie and stores the user on flask.g.api_user.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        scheme, _, token = auth_header.partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            return jsonify({'error': 'Missing or malformed Authorization header. Use "Bearer <token>".'}), 401
+        api_user = User.find_by_api_token(token.strip())
+        if api_user is None:
+            return jsonify({'error': 'Invalid or revoked API token.'}), 401
+        g.api_user = api_user
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,58 @@
+# app/holiday_calendar.py
+"""
+In-memory, date-indexed holiday calendar shared by every request in a worker.
+
+Holidays change a few times a year but are read on most teacher and timetable
+pages. The calendar is loaded once per worker and rebuilt only after
+add_holiday / edit_holiday / delete_holiday call invalidate_holiday_calendar().
+"""
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from app.models import Holiday
+from app.cache_utils import get_cached, bump_generation
+
+HOLIDAY_CACHE_NAME = 'holidays'
+
+# Plain snapshot of a Holiday row; safe to keep across requests unlike ORM instances
+HolidayInfo = namedtuple('HolidayInfo', ['id', 'name', 'date', 'type', 'description'])
+
+class HolidayCalendar:
+    def __init__(self, holidays):
+        self._holidays = sorted(holidays, key=lambda h: h.date)
+        self._dates = [h.date for h in self._holidays]
+        self._by_date = {h.date: h for h in self._holidays}
+
+    def get(self, day):
+        """Returns the holiday on `day`, or None."""
+        return self._by_date.get(day)
+
+    def between(self, start, end):
+        """Holidays from `start` to `end` inclusive, in date order."""
+        return self._holidays[bisect_left(self._dates, start):bisect_right(self._dates, end)]
+
+    def dates_between(self, start, end):
+        return set(self._dates[bisect_left(self._dates, start):bisect_right(self._dates, end)])
+
+    def upcoming(self, from_date, limit):
+        index = bisect_left(self._dates, from_date)
+        return self._holidays[index:index + limit]
+
+    def for_year(self, year):
+        return [h for h in self._holidays if h.date.year == year]
+
+    def years(self):
+        """Years that have at least one holiday, newest first."""
+        return sorted({d.year for d in self._dates}, reverse=True)
+
+def _load_holiday_calendar():
+    rows = Holiday.query.with_entities(
+        Holiday.id, Holiday.name, Holiday.date, Holiday.type, Holiday.description
+    ).all()
+    return HolidayCalendar([HolidayInfo(*row) for row in rows])
+
+def get_holiday_calendar():
+    return get_cached(HOLIDAY_CACHE_NAME, _load_holiday_calendar)
+
+def invalidate_holiday_calendar():
+    """Call after committing any change to Holiday rows."""
+    bump_generation(HOLIDAY_CACHE_NAME)
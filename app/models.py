@@ -1,6 +1,8 @@
 # app/models.py
 
 import enum
+import hashlib
+import secrets
 from datetime import datetime, date as PyDate # Use PyDate for date objects to avoid conflict
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
@@ -37,6 +39,9 @@ ATTENDANCE_STATUS_CHOICES = [
     ('school_holiday', 'School Holiday'),
 ]
 
+# Weekday names, indexed like date.weekday() and ClassSchedule.day_of_week (Monday == 0)
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 # --- Association Table for Student and SubjectClass (Enrollment) ---
 enrollments = db.Table('enrollments',
     db.Column('student_id', db.Integer, db.ForeignKey('students.id'), primary_key=True),
@@ -57,6 +62,10 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, nullable=True)
+    # SHA-256 of the bearer token used by JSON API clients (tablets, SIS sync); the token itself is never stored
+    api_token_hash = db.Column(db.String(64), index=True, unique=True, nullable=True)
+    # Signed into the user's calendar feed URLs; bumping it revokes every URL they were given
+    calendar_feed_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Relationship to SubjectClass (classes taught by this user if they are a teacher)
     classes_taught = db.relationship('SubjectClass', backref='teacher_user', lazy='dynamic', foreign_keys='SubjectClass.teacher_user_id')
@@ -82,6 +91,29 @@ class User(UserMixin, db.Model):
     def is_staff(self):
         return self.role == UserRole.STAFF
 
+    def can_manage_class(self, subject_class):
+        """Admins and staff can manage any class; teachers only the classes assigned to them."""
+        if self.is_admin or self.is_staff:
+            return True
+        return self.is_teacher and subject_class.teacher_user_id == self.id
+
+    def generate_api_token(self):
+        """Creates a new API token for this user, replacing any previous one. Returns the plain token."""
+        token = secrets.token_urlsafe(32)
+        self.api_token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        return token
+
+    def revoke_calendar_feeds(self):
+        """Invalidates every calendar feed URL issued to this user; new ones are issued from the Calendar Feeds page."""
+        self.calendar_feed_version = (self.calendar_feed_version or 0) + 1
+
+    @staticmethod
+    def find_by_api_token(token):
+        if not token:
+            return None
+        token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        return User.query.filter_by(api_token_hash=token_hash, is_active=True).first()
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
@@ -138,6 +170,8 @@ class Student(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     is_in_arrears = db.Column(db.Boolean, default=False, nullable=False)
+    # Maintained by app/absence_monitor.py, not edited by hand
+    is_chronically_absent = db.Column(db.Boolean, default=False, nullable=False, index=True)
 
     # Relationship to Attendance (attendance entries for this student)
     # This is established by the backref 'attendances' from Attendance.student
@@ -181,6 +215,10 @@ class Attendance(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('student_id', 'subject_class_id', 'date', 'session_time', name='_student_class_date_session_uc'),
+        # Class/date lookups (reports, matrices, week view) can't use the unique index, which leads with student_id
+        db.Index('ix_attendance_records_class_date', 'subject_class_id', 'date'),
+        # One student's history across classes, newest first (keyset on date, id)
+        db.Index('ix_attendance_records_student_date', 'student_id', 'date', 'id'),
     )
 
     def __repr__(self):
@@ -188,6 +226,62 @@ class Attendance(db.Model):
         class_name = self.subject_class.name if self.subject_class else "N/A"
         return f'<Attendance {student_name} - {class_name} on {self.date}: {self.status}>'
 
+# --- Per-student attendance totals ---
+class AttendanceSummary(db.Model):
+    """
+    Running status counts for one student in one class. Kept in step with
+    attendance_records by attendance_service.bulk_upsert_attendance, in the same
+    transaction as each write, so reports read one row per student instead of
+    every record. Rebuild with `flask rebuild_attendance_summaries`.
+    """
+    __tablename__ = 'attendance_summaries'
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    subject_class_id = db.Column(db.Integer, db.ForeignKey('subject_classes.id'), nullable=False, index=True)
+    present_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    absent_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    late_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    excused_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    public_holiday_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    school_holiday_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    total_count = db.Column(db.Integer, default=0, nullable=False, server_default='0') # Every record, whatever its status
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'subject_class_id', name='_summary_student_class_uc'),
+    )
+
+    def __repr__(self):
+        return f"<AttendanceSummary student {self.student_id} class {self.subject_class_id}: {self.total_count} records>"
+
+class DailyAttendanceRollup(db.Model):
+    """
+    Status counts for one class on one date, kept in step with attendance_records
+    by attendance_service.bulk_upsert_attendance like AttendanceSummary. Trend
+    charts over months or years read these rows instead of the records.
+    Filled from existing records by its migration; rebuild with `flask backfill_daily_rollup`.
+    """
+    __tablename__ = 'daily_attendance_rollup'
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    subject_class_id = db.Column(db.Integer, db.ForeignKey('subject_classes.id'), nullable=False, index=True)
+    present_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    absent_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    late_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    excused_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    public_holiday_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    school_holiday_count = db.Column(db.Integer, default=0, nullable=False, server_default='0')
+    total_count = db.Column(db.Integer, default=0, nullable=False, server_default='0') # Every record, whatever its status
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Date first, so date-range scans across all classes use it too
+        db.UniqueConstraint('date', 'subject_class_id', name='_rollup_date_class_uc'),
+    )
+
+    def __repr__(self):
+        return f"<DailyAttendanceRollup class {self.subject_class_id} on {self.date}: {self.total_count} records>"
+
 # --- NEW ClassSchedule Model ---
 class ClassSchedule(db.Model):
     __tablename__ = 'class_schedules'
@@ -195,7 +289,7 @@ class ClassSchedule(db.Model):
     subject_class_id = db.Column(db.Integer, db.ForeignKey('subject_classes.id'), nullable=False)
     # The backref 'subject_class' on this model is created by SubjectClass.schedules
     
-    day_of_week = db.Column(db.String(20), nullable=False)  # e.g., "Monday", "Tuesday" (ensure this matches values used in timetable logic)
+    day_of_week = db.Column(db.SmallInteger, nullable=False)  # Monday == 0 ... Sunday == 6, like date.weekday(); see DAYS_OF_WEEK
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
     location = db.Column(db.String(100), nullable=True) # e.g., "Room 101", "Online"
@@ -204,8 +298,67 @@ class ClassSchedule(db.Model):
     # updated_at can be added if schedules are frequently modified
     # updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Week-wide lookups in weekday/time order (school timetable)
+        db.Index('ix_class_schedules_day_start', 'day_of_week', 'start_time'),
+        # One class's sessions in weekday/time order (session dates, class lists, edit form)
+        db.Index('ix_class_schedules_class_day', 'subject_class_id', 'day_of_week', 'start_time'),
+    )
+
+    @property
+    def day_name(self):
+        return DAYS_OF_WEEK[self.day_of_week]
+
     def __repr__(self):
         # Accessing subject_class.name requires the backref to be correctly set up and eager/joined loaded if accessed frequently
         sc_name = self.subject_class.name if self.subject_class else self.subject_class_id
-        return f"<ClassSchedule for Class '{sc_name}' - {self.day_of_week} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}>"
+        return f"<ClassSchedule for Class '{sc_name}' - {self.day_name} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}>"
 
+
+# --- Offline sync dedupe table ---
+class AttendanceSyncKey(db.Model):
+    """
+    Remembers which client-generated idempotency keys have already been applied by
+    the offline sync endpoint, so re-sent mutations are skipped cheaply.
+    """
+    __tablename__ = 'attendance_sync_keys'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    idempotency_key = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='_sync_user_key_uc'),
+    )
+
+    def __repr__(self):
+        return f"<AttendanceSyncKey {self.idempotency_key} (user {self.user_id})>"
+
+
+# --- Background PDF report jobs ---
+REPORT_JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+class ReportJob(db.Model):
+    """
+    One queued PDF report, rendered in the background by app/pdf_reports.py.
+    Finished files are written to instance/reports/<file_name>.
+    """
+    __tablename__ = 'report_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    report_type = db.Column(db.String(50), nullable=False) # Key of pdf_reports.REPORT_TYPES
+    subject_class_id = db.Column(db.Integer, db.ForeignKey('subject_classes.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=True)
+    end_date = db.Column(db.Date, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    file_name = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    requested_by_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    subject_class = db.relationship('SubjectClass')
+    requested_by = db.relationship('User', foreign_keys=[requested_by_user_id])
+
+    def __repr__(self):
+        return f"<ReportJob {self.id} {self.report_type} class {self.subject_class_id}: {self.status}>"
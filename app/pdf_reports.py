@@ -0,0 +1,124 @@
+# app/pdf_reports.py
+"""
+Background PDF report generation.
+
+Requests only queue a ReportJob row and hand its id to a per-worker process pool
+(REPORT_WORKERS processes, started on first use). Each pool process builds its
+own app, renders the report's Jinja template to HTML and lays it out to PDF with
+WeasyPrint, so long jobs run in parallel without holding up web workers.
+Finished files are written to instance/reports and served from there.
+
+WeasyPrint is an optional dependency (requirements-pdf.txt): without it jobs fail with a clear error.
+Jobs left queued (e.g. by a restarted web worker) are picked up again by
+`flask run_report_jobs`.
+"""
+import importlib.util
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app, render_template
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import ReportJob, SubjectClass, Student
+from app.attendance_service import build_class_report_summaries, count_recorded_session_dates
+
+REPORTS_DIR_NAME = 'reports'
+# report_type -> (label, template)
+REPORT_TYPES = OrderedDict([
+    ('class_report', ('Class Attendance Report', 'reports/class_report_pdf.html')),
+    ('attendance_letters', ('Attendance Letters (one page per student)', 'reports/attendance_letters_pdf.html')),
+])
+
+_executor = None # Per web worker, created on first use
+_worker_app = None # Per pool process, created by _init_pool_process
+
+
+def weasyprint_available():
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def get_reports_dir():
+    reports_path = os.path.join(current_app.instance_path, REPORTS_DIR_NAME)
+    os.makedirs(reports_path, exist_ok=True)
+    return reports_path
+
+
+def _init_pool_process(config_name):
+    global _worker_app
+    from app import create_app # Each pool process needs its own app and database connections
+    _worker_app = create_app(config_name)
+
+
+def _run_in_pool_process(job_id):
+    with _worker_app.app_context():
+        return run_report_job(job_id)
+
+
+def submit_report_job(job_id):
+    """Hands a committed, queued job to this worker's process pool."""
+    global _executor
+    if _executor is None:
+        from config import get_config_name
+        # 'spawn' so pool processes never inherit the web worker's database connections
+        _executor = ProcessPoolExecutor(
+            max_workers=current_app.config['REPORT_WORKERS'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_pool_process, initargs=(get_config_name(),)
+        )
+    return _executor.submit(_run_in_pool_process, job_id)
+
+
+def _with_attendance_rate(summary):
+    """Adds the attendance rate used throughout the app: present + late over all non-holiday records."""
+    attended = summary['total_present'] + summary['total_late']
+    counted = attended + summary['total_absent'] + summary['total_excused']
+    return dict(summary, attendance_rate=round(attended / counted * 100, 1) if counted else None)
+
+
+def build_report_html(job):
+    """Renders the job's report template with its class data."""
+    subject_class = SubjectClass.query.get(job.subject_class_id)
+    if subject_class is None:
+        raise ValueError(f"Class {job.subject_class_id} no longer exists.")
+    students = subject_class.students_enrolled.filter(Student.is_active == True).order_by(Student.last_name, Student.first_name).all()
+    session_count = count_recorded_session_dates(subject_class.id, job.start_date, job.end_date)
+    rows = [_with_attendance_rate(summary) for summary in build_class_report_summaries(subject_class.id, students, job.start_date, job.end_date)]
+    label, template = REPORT_TYPES[job.report_type]
+    return render_template(template, job=job, report_label=label, subject_class=subject_class, rows=rows,
+                           session_count=session_count, generated_at=datetime.now())
+
+
+def run_report_job(job_id):
+    """
+    Renders one queued job to instance/reports. The job is claimed with a
+    conditional UPDATE first, so a job is only ever rendered once even if both
+    the pool and `flask run_report_jobs` see it. Returns the final status.
+    """
+    claimed = ReportJob.query.filter_by(id=job_id, status='queued').update(
+        {'status': 'running', 'started_at': datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+    if not claimed:
+        return None
+
+    job = ReportJob.query.get(job_id)
+    try:
+        html = build_report_html(job)
+        if not weasyprint_available():
+            raise RuntimeError("WeasyPrint is not installed on the server; install it to generate PDF reports.")
+        from weasyprint import HTML
+        file_name = secure_filename(f"{job.report_type}_{job.subject_class.name}_{job.id}.pdf")
+        file_path = os.path.join(get_reports_dir(), file_name)
+        HTML(string=html, base_url=current_app.root_path).write_pdf(file_path + '.part')
+        os.replace(file_path + '.part', file_path)
+        job.status, job.file_name = 'completed', file_name
+    except Exception as e:
+        db.session.rollback()
+        job = ReportJob.query.get(job_id)
+        job.status, job.error = 'failed', str(e)
+        current_app.logger.error(f"Error generating report job {job_id}: {e}", exc_info=True)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job.status
@@ -0,0 +1,160 @@
+# app/schedule_clashes.py
+"""
+Room and teacher double-booking checks for class schedules.
+
+Two sessions clash when they share a room (ClassSchedule.location) or a teacher
+(their classes' teacher_user_id), fall on the same weekday, overlap in time and
+belong to classes whose date ranges overlap. Rooms are compared ignoring case
+and spacing; online/TBA locations never clash.
+
+The clash index keeps, per (room or teacher, weekday), every session's interval
+sorted by start time together with a running maximum of the end times. A
+proposed session is checked by bisecting for the sessions that start before it
+ends and walking back only while that running maximum still reaches past its
+start, i.e. O(log n) plus the clashes found. The index is built from one query
+and kept per worker until the 'schedules' generation is bumped.
+The whole-timetable audit sweeps each (resource, weekday) list once in start
+order, keeping a heap of the sessions still running.
+"""
+import heapq
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import accumulate
+from app import db
+from app.models import ClassSchedule, SubjectClass, DAYS_OF_WEEK
+from app.cache_utils import get_cached
+from app.schedule_resolver import SCHEDULE_CACHE_NAME
+
+SHARED_LOCATIONS = {'online', 'tba', 'tbc', 'n/a'}
+
+# start_minute/end_minute count from midnight; end_minute goes past 1440 for sessions running past midnight.
+# schedule_id is None for sessions that have not been saved yet.
+ScheduleInterval = namedtuple('ScheduleInterval', [
+    'start_minute', 'end_minute', 'day_of_week', 'start_time', 'end_time', 'location',
+    'schedule_id', 'class_id', 'class_name', 'class_start_date', 'class_end_date', 'teacher_user_id'
+])
+# kind is 'room' or 'teacher'; `other` is the session `interval` clashes with
+ScheduleClash = namedtuple('ScheduleClash', ['kind', 'interval', 'other'])
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def make_interval(day_of_week, start_time, end_time, location, class_id, class_name,
+                  class_start_date, class_end_date, teacher_user_id, schedule_id=None):
+    start_minute, end_minute = _minutes(start_time), _minutes(end_time)
+    if end_minute <= start_minute:
+        end_minute += 24 * 60
+    return ScheduleInterval(start_minute, end_minute, day_of_week, start_time, end_time, location,
+                            schedule_id, class_id, class_name, class_start_date, class_end_date, teacher_user_id)
+
+
+def room_key(location):
+    """Normalised room name, or None for blank and shared (online/TBA) locations."""
+    key = ' '.join((location or '').split()).casefold()
+    return key if key and key not in SHARED_LOCATIONS else None
+
+
+def _resources(interval):
+    resources = []
+    room = room_key(interval.location)
+    if room:
+        resources.append(('room', room))
+    if interval.teacher_user_id is not None:
+        resources.append(('teacher', interval.teacher_user_id))
+    return resources
+
+
+def _class_dates_overlap(a, b):
+    return ((a.class_start_date is None or b.class_end_date is None or a.class_start_date <= b.class_end_date) and
+            (b.class_start_date is None or a.class_end_date is None or b.class_start_date <= a.class_end_date))
+
+
+def _clashes(a, b):
+    return a.start_minute < b.end_minute and b.start_minute < a.end_minute and _class_dates_overlap(a, b)
+
+
+class ClashIndex:
+    def __init__(self, intervals):
+        groups = {}
+        for interval in intervals:
+            for resource in _resources(interval):
+                groups.setdefault((resource, interval.day_of_week), []).append(interval)
+        self._groups = {}
+        for group_key, group in groups.items():
+            group.sort(key=lambda interval: interval.start_minute)
+            starts = [interval.start_minute for interval in group]
+            max_ends = list(accumulate((interval.end_minute for interval in group), max))
+            self._groups[group_key] = (starts, max_ends, group)
+
+    def clashes_with(self, interval, exclude_class_id=None):
+        """Indexed sessions clashing with `interval`, skipping those of class `exclude_class_id`."""
+        clashes = []
+        for resource in _resources(interval):
+            starts, max_ends, group = self._groups.get((resource, interval.day_of_week), ((), (), ()))
+            position = bisect_left(starts, interval.end_minute) - 1 # Last session starting before `interval` ends
+            while position >= 0 and max_ends[position] > interval.start_minute:
+                other = group[position]
+                if other.class_id != exclude_class_id and _clashes(interval, other):
+                    clashes.append(ScheduleClash(resource[0], interval, other))
+                position -= 1
+        return clashes
+
+    def audit(self):
+        """Every clashing pair of indexed sessions, in one sweep per (resource, weekday)."""
+        clashes = []
+        for (resource, _), (_, _, group) in self._groups.items():
+            running = [] # Heap of (end_minute, position) of sessions that started earlier
+            for position, interval in enumerate(group):
+                while running and running[0][0] <= interval.start_minute:
+                    heapq.heappop(running)
+                for _, earlier_position in running:
+                    other = group[earlier_position]
+                    if _class_dates_overlap(interval, other):
+                        clashes.append(ScheduleClash(resource[0], other, interval))
+                heapq.heappush(running, (interval.end_minute, position))
+        clashes.sort(key=lambda clash: (clash.interval.day_of_week, clash.interval.start_minute, clash.kind, clash.interval.class_name))
+        return clashes
+
+
+def load_schedule_intervals():
+    rows = db.session.query(
+        ClassSchedule.id, ClassSchedule.day_of_week, ClassSchedule.start_time, ClassSchedule.end_time, ClassSchedule.location,
+        SubjectClass.id, SubjectClass.name, SubjectClass.start_date, SubjectClass.end_date, SubjectClass.teacher_user_id
+    ).join(SubjectClass, ClassSchedule.subject_class_id == SubjectClass.id).all()
+    return [
+        make_interval(day_of_week, start_time, end_time, location, class_id, class_name,
+                      class_start_date, class_end_date, teacher_user_id, schedule_id=schedule_id)
+        for (schedule_id, day_of_week, start_time, end_time, location,
+             class_id, class_name, class_start_date, class_end_date, teacher_user_id) in rows
+    ]
+
+
+def get_clash_index():
+    return get_cached(SCHEDULE_CACHE_NAME, lambda: ClashIndex(load_schedule_intervals()), key='clash_index')
+
+
+def find_schedule_clashes(intervals, exclude_class_id=None):
+    """
+    Clashes of the proposed `intervals` (one class's sessions) with the saved
+    timetable and with each other, as (position in `intervals`, ScheduleClash).
+    Pass the class's id as `exclude_class_id` when its saved sessions are being replaced.
+    """
+    index = get_clash_index()
+    found = []
+    for position, interval in enumerate(intervals):
+        found.extend((position, clash) for clash in index.clashes_with(interval, exclude_class_id))
+        for other in intervals[:position]:
+            if other.day_of_week == interval.day_of_week and _clashes(interval, other):
+                found.extend((position, ScheduleClash(kind, interval, other))
+                             for kind, _ in set(_resources(interval)) & set(_resources(other)))
+    return found
+
+
+def describe_clash(clash):
+    other = clash.other
+    when = f"{DAYS_OF_WEEK[other.day_of_week]} {other.start_time.strftime('%H:%M')}-{other.end_time.strftime('%H:%M')}"
+    if clash.kind == 'room':
+        return f"{other.location} is already booked for '{other.class_name}' on {when}."
+    return f"The teacher already teaches '{other.class_name}' on {when}."
@@ -0,0 +1,121 @@
+# app/schedule_resolver.py
+"""
+Resolves when a class actually meets.
+
+Each class's ClassSchedule rows are compiled once into a per-weekday list of
+session slots and kept in a per-worker cache. The cache is dropped whenever an
+admin adds, edits, deletes or imports classes (invalidate_schedule_cache()).
+Classes without ClassSchedule rows fall back to the weekdays named in the
+legacy SubjectClass.schedule_details text, as the old parsing did.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from app.models import ClassSchedule
+from app.cache_utils import get_cached, bump_generation
+from app.holiday_calendar import get_holiday_calendar
+
+SCHEDULE_CACHE_NAME = 'schedules'
+
+LEGACY_DAY_ABBREVIATIONS = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+
+# start_time/end_time/location are None for slots derived from schedule_details
+SessionSlot = namedtuple('SessionSlot', ['schedule_id', 'start_time', 'end_time', 'location'])
+# session_time is only set when the class meets more than once that day, matching how
+# Attendance rows are keyed by the daily and weekly marking sheets
+Session = namedtuple('Session', ['date', 'session_time', 'start_time', 'end_time', 'location', 'schedule_id'])
+
+
+def parse_legacy_schedule_days(schedule_details):
+    """Weekday numbers (Monday == 0) mentioned in a free-text schedule such as 'Mon & Thu 4pm'."""
+    if not schedule_details:
+        return []
+    details_lower = schedule_details.lower()
+    return sorted(day for abbr, day in LEGACY_DAY_ABBREVIATIONS.items() if abbr in details_lower)
+
+
+class CompiledSchedule:
+    def __init__(self, class_id, start_date, end_date, slots_by_weekday, from_legacy_details=False):
+        self.class_id = class_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.slots_by_weekday = slots_by_weekday # {weekday: tuple of SessionSlot sorted by start time}
+        self.from_legacy_details = from_legacy_details
+
+    @property
+    def weekdays(self):
+        return sorted(self.slots_by_weekday)
+
+    def sessions_between(self, start, end, skip_holidays=True):
+        """Every session from `start` to `end` inclusive, in date and time order."""
+        if self.start_date and start < self.start_date:
+            start = self.start_date
+        if self.end_date and end > self.end_date:
+            end = self.end_date
+        if not self.slots_by_weekday or start > end:
+            return []
+        holiday_dates = get_holiday_calendar().dates_between(start, end) if skip_holidays else set()
+
+        sessions = []
+        # Walk each scheduled weekday in 7-day steps rather than testing every calendar day
+        for weekday, slots in self.slots_by_weekday.items():
+            session_date = start + timedelta(days=(weekday - start.weekday()) % 7)
+            multiple_sessions = len(slots) > 1
+            while session_date <= end:
+                if session_date not in holiday_dates:
+                    for slot in slots:
+                        sessions.append(Session(
+                            session_date, slot.start_time if multiple_sessions else None,
+                            slot.start_time, slot.end_time, slot.location, slot.schedule_id
+                        ))
+                session_date += timedelta(days=7)
+        sessions.sort(key=lambda s: (s.date, s.start_time is not None, s.start_time))
+        return sessions
+
+    def session_dates_between(self, start, end, skip_holidays=True):
+        return sorted({session.date for session in self.sessions_between(start, end, skip_holidays)})
+
+    def default_session_date(self, today):
+        """
+        The session date to open the marking sheet on: today or the latest earlier
+        session this week, otherwise the week's first upcoming session.
+        Falls back to `today` when the class does not meet this week.
+        """
+        week_start = today - timedelta(days=today.weekday())
+        week_dates = self.session_dates_between(week_start, week_start + timedelta(days=6))
+        if not week_dates:
+            return today
+        past_dates = [d for d in week_dates if d <= today]
+        return past_dates[-1] if past_dates else week_dates[0]
+
+
+def compile_class_schedule(subject_class):
+    slots_by_weekday = {}
+    for schedule in subject_class.schedules.order_by(ClassSchedule.day_of_week, ClassSchedule.start_time).all():
+        slots_by_weekday.setdefault(schedule.day_of_week, []).append(
+            SessionSlot(schedule.id, schedule.start_time, schedule.end_time, schedule.location)
+        )
+    from_legacy_details = False
+    if not slots_by_weekday:
+        legacy_days = parse_legacy_schedule_days(subject_class.schedule_details)
+        slots_by_weekday = {day: [SessionSlot(None, None, None, None)] for day in legacy_days}
+        from_legacy_details = bool(legacy_days)
+    return CompiledSchedule(
+        subject_class.id, subject_class.start_date, subject_class.end_date,
+        {weekday: tuple(slots) for weekday, slots in slots_by_weekday.items()},
+        from_legacy_details
+    )
+
+
+def get_class_schedule(subject_class):
+    """Returns the cached CompiledSchedule for `subject_class`, compiling it on first use."""
+    compiled_by_class = get_cached(SCHEDULE_CACHE_NAME, dict)
+    compiled = compiled_by_class.get(subject_class.id)
+    if compiled is None:
+        compiled = compile_class_schedule(subject_class)
+        compiled_by_class[subject_class.id] = compiled
+    return compiled
+
+
+def invalidate_schedule_cache():
+    """Call after committing any change to classes' schedules or start/end dates."""
+    bump_generation(SCHEDULE_CACHE_NAME)
@@ -0,0 +1,82 @@
+# app/student_history.py
+"""
+One student's attendance across every class, newest first.
+
+Records are paged by keyset on (date DESC, id DESC): each page starts after the
+(date, id) of the last row of the previous page, so a page costs the same for a
+student with five years of records as for one with five weeks. Class and subject
+names are joined into the same query. Per-class totals come from the
+AttendanceSummary rows, one per class, rather than from the records.
+"""
+from datetime import datetime
+from app import db
+from app.models import Attendance, AttendanceSummary, SubjectClass, Subject, ATTENDANCE_STATUS_CHOICES
+from app.attendance_service import SUMMARY_COUNT_COLUMNS
+from app.attendance_analytics import ATTENDED_STATUSES, RATE_STATUSES
+
+STATUS_LABELS = dict(ATTENDANCE_STATUS_CHOICES)
+
+
+def format_history_cursor(record_date, record_id):
+    return f"{record_date.strftime('%Y-%m-%d')}.{record_id}"
+
+
+def parse_history_cursor(cursor):
+    """Parses a 'YYYY-MM-DD.<id>' cursor into (date, id). Raises ValueError if malformed."""
+    date_part, _, id_part = cursor.partition('.')
+    return datetime.strptime(date_part, '%Y-%m-%d').date(), int(id_part)
+
+
+def student_history_page(student_id, per_page, cursor=None):
+    """
+    One page of the student's attendance records, newest first, as dicts.
+    `cursor` is the value returned as next_cursor by the previous page.
+    Returns (records, next_cursor); next_cursor is None on the last page.
+    """
+    query = db.session.query(
+        Attendance.id, Attendance.date, Attendance.session_time, Attendance.status, Attendance.remarks,
+        Attendance.subject_class_id, SubjectClass.name.label('class_name'), Subject.name.label('subject_name')
+    ).join(SubjectClass, Attendance.subject_class_id == SubjectClass.id
+    ).outerjoin(Subject, SubjectClass.subject_id == Subject.id
+    ).filter(Attendance.student_id == student_id)
+    if cursor:
+        cursor_date, cursor_id = parse_history_cursor(cursor)
+        query = query.filter(db.tuple_(Attendance.date, Attendance.id) < db.tuple_(cursor_date, cursor_id))
+    rows = query.order_by(Attendance.date.desc(), Attendance.id.desc()).limit(per_page + 1).all()
+
+    records = [{
+        'id': row.id,
+        'date': row.date.strftime('%Y-%m-%d'),
+        'session_time': row.session_time.strftime('%H:%M') if row.session_time else None,
+        'status': row.status,
+        'status_label': STATUS_LABELS.get(row.status, row.status),
+        'remarks': row.remarks,
+        'class_id': row.subject_class_id,
+        'class_name': row.class_name,
+        'subject_name': row.subject_name,
+    } for row in rows[:per_page]]
+    next_cursor = format_history_cursor(rows[per_page - 1].date, rows[per_page - 1].id) if len(rows) > per_page else None
+    return records, next_cursor
+
+
+def student_class_totals(student_id):
+    """Status counts per class the student has records in, from their AttendanceSummary rows."""
+    rows = db.session.query(AttendanceSummary, SubjectClass.name, Subject.name).join(
+        SubjectClass, AttendanceSummary.subject_class_id == SubjectClass.id
+    ).outerjoin(Subject, SubjectClass.subject_id == Subject.id).filter(
+        AttendanceSummary.student_id == student_id, AttendanceSummary.total_count > 0
+    ).order_by(SubjectClass.name).all()
+
+    totals = []
+    for summary, class_name, subject_name in rows:
+        counts = {status: getattr(summary, column) for status, column in SUMMARY_COUNT_COLUMNS.items()}
+        rate_total = sum(counts[status] for status in RATE_STATUSES)
+        totals.append({
+            'class_id': summary.subject_class_id,
+            'class_name': class_name,
+            'subject_name': subject_name,
+            'counts': counts,
+            'total_records': summary.total_count,
+            'attendance_rate': round(sum(counts[status] for status in ATTENDED_STATUSES) / rate_total * 100, 1) if rate_total else None,
+        })
+    return totals
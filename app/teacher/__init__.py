@@ -3,5 +3,5 @@ from flask import Blueprint
 
 teacher = Blueprint('teacher', __name__, template_folder='templates', url_prefix='/teacher')
 
-from . import routes
+from . import routes, api
     
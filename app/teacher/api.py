@@ -0,0 +1,106 @@
+# app/teacher/api.py
+"""
+JSON API for recording attendance without the WTForms HTML round trip.
+
+Classroom tablets and the SIS sync post many entries in one request. These routes
+authenticate with a bearer token (see api_token_required) rather than the session
+cookie, so they are exempt from CSRF protection.
+"""
+from flask import request, jsonify, current_app, g
+from . import teacher
+from app import db, csrf
+from app.decorators import api_token_required
+from sqlalchemy.exc import IntegrityError
+from app.attendance_service import validate_attendance_entries, bulk_upsert_attendance, apply_sync_batch
+from app.absence_monitor import refresh_chronic_absence_flags
+
+
+def _error_list(errors):
+    return [{'index': index, 'errors': messages} for index, messages in sorted(errors.items())]
+
+
+@teacher.route('/api/attendance/batch', methods=['POST'])
+@csrf.exempt
+@api_token_required
+def api_attendance_batch():
+    """
+    Records many attendance entries in one transaction.
+
+    Expects {"entries": [{"class_id", "date", "session_time", "student_id", "status", "remarks"}, ...]}.
+    The batch is all-or-nothing: if any entry is invalid nothing is saved and the
+    per-entry errors are returned with a 400.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('entries'), list):
+        return jsonify({'error': 'Request body must be a JSON object with an "entries" list.'}), 400
+
+    raw_entries = payload['entries']
+    max_entries = current_app.config.get('ATTENDANCE_API_MAX_ENTRIES', 5000)
+    if not raw_entries:
+        return jsonify({'error': 'No entries supplied.'}), 400
+    if len(raw_entries) > max_entries:
+        return jsonify({'error': f'Too many entries in one request (maximum {max_entries}).'}), 413
+
+    entries, errors = validate_attendance_entries(raw_entries, g.api_user)
+    if errors:
+        return jsonify({'error': 'Validation failed. No entries were saved.', 'entries': _error_list(errors)}), 400
+
+    try:
+        result = bulk_upsert_attendance(entries.values(), recorded_by_user_id=g.api_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error in api_attendance_batch for user {g.api_user.username}: {e}", exc_info=True)
+        return jsonify({'error': 'Could not save attendance.'}), 500
+
+    if result['created'] or result['updated']:
+        refresh_chronic_absence_flags({entry['student_id'] for entry in entries.values()})
+    return jsonify({'saved': len(entries), **result})
+
+
+@teacher.route('/api/attendance/sync', methods=['POST'])
+@csrf.exempt
+@api_token_required
+def api_attendance_sync():
+    """
+    Idempotent sync endpoint for clients that queue attendance while offline.
+
+    Expects {"mutations": [{"idempotency_key", "class_id", "date", "session_time",
+    "student_id", "status", "remarks"}, ...]}. Mutations whose key was already
+    applied are reported as "duplicate" and cost no writes; the rest are validated
+    per item and applied together in one transaction.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('mutations'), list):
+        return jsonify({'error': 'Request body must be a JSON object with a "mutations" list.'}), 400
+
+    mutations = payload['mutations']
+    max_entries = current_app.config.get('ATTENDANCE_API_MAX_ENTRIES', 5000)
+    if len(mutations) > max_entries:
+        return jsonify({'error': f'Too many mutations in one request (maximum {max_entries}).'}), 413
+
+    # A concurrent request carrying the same keys can win the race to insert them;
+    # on a unique-constraint clash retry once so those keys come back as duplicates.
+    for attempt in range(2):
+        try:
+            results = apply_sync_batch(mutations, g.api_user)
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == 1:
+                current_app.logger.error(f"Repeated key conflict in api_attendance_sync for user {g.api_user.username}", exc_info=True)
+                return jsonify({'error': 'Conflicting concurrent sync, please retry.'}), 409
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error in api_attendance_sync for user {g.api_user.username}: {e}", exc_info=True)
+            return jsonify({'error': 'Could not apply mutations.'}), 500
+
+    applied_student_ids = {mutations[index]['student_id'] for index, result in enumerate(results) if result['status'] == 'applied'}
+    if applied_student_ids:
+        refresh_chronic_absence_flags(applied_student_ids)
+
+    counts = {'applied': 0, 'duplicate': 0, 'rejected': 0}
+    for result in results:
+        counts[result['status']] += 1
+    return jsonify({'results': results, **counts})
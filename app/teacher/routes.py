@@ -4,11 +4,20 @@ from flask_login import login_required, current_user # current_user is used for
 from . import teacher 
 from app.decorators import teacher_required # This might be used by other teacher-specific routes
 # from app.decorators import admin_required, staff_required # Not directly used here, but good to have if needed elsewhere
-from app.models import User, SubjectClass, Student, Attendance, Holiday, ATTENDANCE_STATUS_CHOICES 
-from app.teacher.forms import MarkAttendanceForm, StudentAttendanceEntryForm 
+from app.models import User, SubjectClass, Student, Attendance, ATTENDANCE_STATUS_CHOICES, DAYS_OF_WEEK
+from app.teacher.forms import MarkAttendanceForm
+from app.attendance_service import (
+    bulk_upsert_attendance, parse_attendance_sheet, build_class_report_summaries, count_recorded_session_dates,
+    VALID_ATTENDANCE_STATUSES, REMARKS_MAX_LENGTH
+)
+from app.holiday_calendar import get_holiday_calendar
+from app.absence_monitor import refresh_chronic_absence_flags
+from app.schedule_resolver import get_class_schedule
+from app.attendance_matrix import build_attendance_matrix, student_keyset_page, MATRIX_STATUSES
+from app.attendance_export import attendance_records_csv, class_report_csv, attendance_matrix_csv, streamed_csv_response
+from app.conditional_get import page_etag, class_attendance_validator, not_modified_response, with_etag
 from app import db
 from datetime import date, datetime, timedelta 
-from collections import defaultdict
 import calendar 
 
 # --- Existing Teacher Routes ---
@@ -27,21 +36,13 @@ def my_classes():
     ).order_by(SubjectClass.name).all()
     
     today = date.today()
-    upcoming_holidays_query = Holiday.query.filter(Holiday.date >= today).order_by(Holiday.date.asc())
-    upcoming_holidays = upcoming_holidays_query.limit(5).all() 
+    upcoming_holidays = get_holiday_calendar().upcoming(today, 5)
     
     return render_template('teacher/my_classes.html', 
                            classes=assigned_classes, 
                            upcoming_holidays=upcoming_holidays,
                            title="My Classes & Dashboard")
 
-def parse_scheduled_day(schedule_details_str):
-    if not schedule_details_str or len(schedule_details_str) < 3:
-        return None
-    day_abbr = schedule_details_str[:3].lower()
-    days_map = { 'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6 }
-    return days_map.get(day_abbr)
-
 # --- MODIFIED mark_attendance route ---
 @teacher.route('/class/<int:class_id>/attendance/mark', methods=['GET', 'POST'])
 @login_required # Keep @login_required
@@ -72,12 +73,8 @@ def mark_attendance(class_id):
 
     form = MarkAttendanceForm()
     today = date.today()
-    scheduled_weekday = parse_scheduled_day(subject_class.schedule_details)
-
-    default_class_date_for_week = today
-    if scheduled_weekday is not None:
-        days_difference = scheduled_weekday - today.weekday()
-        default_class_date_for_week = today + timedelta(days=days_difference)
+    class_schedule = get_class_schedule(subject_class)
+    default_class_date_for_week = class_schedule.default_session_date(today)
 
     selected_date_str = request.args.get('attendance_date')
     if selected_date_str:
@@ -101,85 +98,222 @@ def mark_attendance(class_id):
     # Check if the selected date is a holiday
     holiday_on_selected_date = None
     if selected_date:
-        holiday_on_selected_date = Holiday.query.filter_by(date=selected_date).first()
+        holiday_on_selected_date = get_holiday_calendar().get(selected_date)
+
+    # On days with several slots each record is keyed by its session_time, as the week grid
+    # keys them; the sheet marks one session at a time, the first unless one is chosen
+    day_sessions = [session for session in class_schedule.sessions_between(selected_date, selected_date, skip_holidays=False)
+                    if session.session_time]
+    session_str = request.values.get('session', '')
+    selected_session_time = next(
+        (session.session_time for session in day_sessions if session.session_time.strftime('%H%M') == session_str),
+        day_sessions[0].session_time if day_sessions else None
+    )
+
+    enrolled_students = subject_class.students_enrolled.filter(Student.is_active==True).order_by(Student.last_name, Student.first_name).all()
+    submitted_rows, sheet_errors = None, {}
 
     if request.method == 'POST' and form.validate_on_submit():
         # Optional: Re-check weekday if strict for teachers but not admin/staff
         # if scheduled_weekday is not None and form.attendance_date.data.weekday() != scheduled_weekday and not (current_user.is_admin or current_user.is_staff):
         #     flash(f"Submission error: Attendance for this class should be on a {subject_class.schedule_details[:3]}. Please select a valid date.", "danger")
         # else:
-        try:
-            for student_entry_data in form.students_attendance.data:
-                student_id = student_entry_data['student_id']
-                status_val = student_entry_data['status'] 
-                remarks = student_entry_data['remarks']
-                
-                attendance_record = Attendance.query.filter_by(
-                    student_id=student_id, 
-                    subject_class_id=class_id, 
-                    date=selected_date # Use the determined selected_date
-                ).first()
-                
-                if attendance_record:
-                    attendance_record.status = status_val 
-                    attendance_record.remarks = remarks
-                    attendance_record.recorded_by_user_id = current_user.id
-                else:
-                    attendance_record = Attendance(
-                        student_id=student_id, 
-                        subject_class_id=class_id, 
-                        date=selected_date, 
-                        status=status_val, 
-                        remarks=remarks, 
-                        recorded_by_user_id=current_user.id
-                    )
-                    db.session.add(attendance_record)
-            db.session.commit()
-            flash(f'Attendance for {selected_date.strftime("%A, %B %d, %Y")} saved successfully!', 'success')
-            return redirect(url_for('teacher.mark_attendance', class_id=class_id, attendance_date=selected_date.strftime('%Y-%m-%d')))
-        except Exception as e:
-            db.session.rollback()
-            flash(f'Error saving attendance: {str(e)}', 'danger')
-            current_app.logger.error(f"Error in mark_attendance POST: {e}", exc_info=True)
-
-    # Populate form for GET request or if POST validation failed
-    while len(form.students_attendance) > 0:
-        form.students_attendance.pop_entry()
-
-    enrolled_students = subject_class.students_enrolled.filter(Student.is_active==True).order_by(Student.last_name, Student.first_name).all()
+        # Only rows for currently enrolled, active students are read from the submission
+        submitted_rows, sheet_errors = parse_attendance_sheet(request.form, [student.id for student in enrolled_students])
+        if sheet_errors:
+            flash(f'{len(sheet_errors)} row(s) have errors. Please correct them and save again.', 'danger')
+        else:
+            try:
+                entries = [{
+                    'student_id': student_id,
+                    'subject_class_id': class_id,
+                    'date': selected_date, # Use the determined selected_date
+                    'session_time': selected_session_time,
+                    'status': row['status'],
+                    'remarks': row['remarks'],
+                } for student_id, row in submitted_rows.items()]
+                result = bulk_upsert_attendance(entries, recorded_by_user_id=current_user.id)
+                db.session.commit()
+                if result['created'] or result['updated']:
+                    refresh_chronic_absence_flags(submitted_rows.keys())
+                flash(f'Attendance for {selected_date.strftime("%A, %B %d, %Y")} saved successfully!', 'success')
+                return redirect(url_for('teacher.mark_attendance', class_id=class_id, attendance_date=selected_date.strftime('%Y-%m-%d'),
+                                        session=selected_session_time.strftime('%H%M') if selected_session_time else None))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error saving attendance: {str(e)}', 'danger')
+                current_app.logger.error(f"Error in mark_attendance POST: {e}", exc_info=True)
+
+    # Build the sheet rows for a GET request, or re-show the submission if it failed
+    # Fetch the whole sheet's existing records in one query instead of one per student
+    existing_attendance_by_student = {
+        record.student_id: record for record in Attendance.query.filter(
+            Attendance.subject_class_id == class_id,
+            Attendance.date == selected_date,
+            Attendance.session_time == selected_session_time # IS NULL on single-session days
+        )
+    }
+    default_status = 'present'
+    if holiday_on_selected_date: # If it's a holiday and no record exists, default to a holiday status
+        if holiday_on_selected_date.type == "Public Holiday":
+            default_status = 'public_holiday'
+        elif holiday_on_selected_date.type == "School Holiday":
+            default_status = 'school_holiday'
+        # Default for other event types on a holiday if no record stays 'present'
+
+    sheet_rows = []
     for student in enrolled_students:
-        existing_attendance = Attendance.query.filter_by(
-            student_id=student.id, 
-            subject_class_id=class_id, 
-            date=selected_date
-        ).first()
-        
-        student_form_entry = StudentAttendanceEntryForm()
-        student_form_entry.student_id = student.id
-        
-        if existing_attendance:
-            student_form_entry.status = existing_attendance.status 
-            student_form_entry.remarks = existing_attendance.remarks
-        elif holiday_on_selected_date: # If it's a holiday and no record exists, default to a holiday status
-             if holiday_on_selected_date.type == "Public Holiday":
-                 student_form_entry.status = 'public_holiday'
-             elif holiday_on_selected_date.type == "School Holiday":
-                 student_form_entry.status = 'school_holiday'
-             else: # Default for other event types on a holiday if no record
-                 student_form_entry.status = 'present' # Or 'absent' or ''
+        if submitted_rows is not None and student.id in submitted_rows:
+            row = submitted_rows[student.id]
+            status_val, remarks = row['status'], row['remarks']
+        elif student.id in existing_attendance_by_student:
+            existing_attendance = existing_attendance_by_student[student.id]
+            status_val, remarks = existing_attendance.status, existing_attendance.remarks
         else:
-            student_form_entry.status = 'present' 
-        form.students_attendance.append_entry(student_form_entry)
+            status_val, remarks = default_status, ''
+        sheet_rows.append({
+            'student': student,
+            'status': status_val,
+            'remarks': remarks or '',
+            'errors': sheet_errors.get(student.id, {}),
+        })
         
     return render_template('teacher/mark_attendance.html', 
                            form=form, 
                            subject_class=subject_class, 
                            title=f"Mark Attendance for {subject_class.name}",
                            selected_date_for_display=selected_date, 
-                           enrolled_students_for_template=enrolled_students,
-                           scheduled_weekday_num=scheduled_weekday,
-                           holiday_info=holiday_on_selected_date)
+                           sheet_rows=sheet_rows,
+                           status_choices=ATTENDANCE_STATUS_CHOICES,
+                           remarks_max_length=REMARKS_MAX_LENGTH,
+                           holiday_info=holiday_on_selected_date,
+                           day_sessions=day_sessions,
+                           selected_session_time=selected_session_time,
+                           scheduled_day_names=[DAYS_OF_WEEK[day] for day in class_schedule.weekdays])
+
+
+# --- Week-at-a-time attendance marking ---
+def get_week_sessions(subject_class, week_start):
+    """
+    Builds every session of the week starting on `week_start` (a Monday) from the
+    class's compiled schedule, holidays included so they can be marked as such.
+    Returns a sorted list of dicts with 'date', 'session_time', 'start_time',
+    'end_time' and 'key' (the suffix of the sheet's form field names).
+    """
+    sessions = []
+    for session in get_class_schedule(subject_class).sessions_between(week_start, week_start + timedelta(days=6), skip_holidays=False):
+        sessions.append({
+            'date': session.date,
+            'session_time': session.session_time,
+            'start_time': session.start_time,
+            'end_time': session.end_time,
+            'key': session.date.strftime('%Y%m%d') + (session.session_time.strftime('%H%M') if session.session_time else ''),
+        })
+    return sessions
+
+@teacher.route('/class/<int:class_id>/attendance/week', methods=['GET', 'POST'])
+@login_required
+def mark_attendance_week(class_id):
+    subject_class = SubjectClass.query.options(
+        db.joinedload(SubjectClass.subject_taught),
+        db.joinedload(SubjectClass.teacher_user)
+    ).get_or_404(class_id)
+
+    if not current_user.can_manage_class(subject_class):
+        flash("You are not authorized to mark attendance for this class.", "danger")
+        if current_user.is_teacher:
+            return redirect(url_for('teacher.my_classes'))
+        return redirect(url_for('main.dashboard'))
 
+    week_str = request.values.get('week')
+    week_of = date.today()
+    if week_str:
+        try:
+            week_of = datetime.strptime(week_str, '%Y-%m-%d').date()
+        except ValueError:
+            flash("Invalid week date, showing the current week.", "warning")
+    week_start = week_of - timedelta(days=week_of.weekday())
+    week_end = week_start + timedelta(days=6)
+
+    sessions = get_week_sessions(subject_class, week_start)
+    enrolled_students = subject_class.students_enrolled.filter(Student.is_active==True).order_by(Student.last_name, Student.first_name).all()
+
+    if request.method == 'POST':
+        entries = []
+        invalid_cells = 0
+        for student in enrolled_students:
+            for session in sessions:
+                status_val = request.form.get(f"status-{student.id}-{session['key']}", '')
+                if not status_val:
+                    continue # Cell left unmarked
+                if status_val not in VALID_ATTENDANCE_STATUSES:
+                    invalid_cells += 1
+                    continue
+                entries.append({
+                    'student_id': student.id,
+                    'subject_class_id': class_id,
+                    'date': session['date'],
+                    'session_time': session['session_time'],
+                    'status': status_val,
+                })
+        if invalid_cells:
+            flash(f"{invalid_cells} cell(s) had an invalid status. Nothing was saved.", "danger")
+        else:
+            try:
+                result = bulk_upsert_attendance(entries, recorded_by_user_id=current_user.id)
+                db.session.commit()
+                if result['created'] or result['updated']:
+                    refresh_chronic_absence_flags({entry['student_id'] for entry in entries})
+                flash(f"Attendance for the week of {week_start.strftime('%B %d, %Y')} saved "
+                      f"({result['created']} added, {result['updated']} updated).", 'success')
+                return redirect(url_for('teacher.mark_attendance_week', class_id=class_id, week=week_start.strftime('%Y-%m-%d')))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error saving attendance: {str(e)}', 'danger')
+                current_app.logger.error(f"Error in mark_attendance_week POST: {e}", exc_info=True)
+
+    # One query for every existing record in the week, keyed by (student, date, session_time)
+    existing_statuses = {
+        (record.student_id, record.date, record.session_time): record.status
+        for record in db.session.query(
+            Attendance.student_id, Attendance.date, Attendance.session_time, Attendance.status
+        ).filter(
+            Attendance.subject_class_id == class_id,
+            Attendance.date >= week_start,
+            Attendance.date <= week_end
+        )
+    }
+    holidays_by_date = {h.date: h for h in get_holiday_calendar().between(week_start, week_end)}
+    holiday_default_status = {'Public Holiday': 'public_holiday', 'School Holiday': 'school_holiday'}
+
+    grid = []
+    for student in enrolled_students:
+        cells = []
+        for session in sessions:
+            status_val = existing_statuses.get((student.id, session['date'], session['session_time']))
+            if status_val is None and session['date'] in holidays_by_date:
+                status_val = holiday_default_status.get(holidays_by_date[session['date']].type, '')
+            cells.append(status_val or '')
+        grid.append({'student': student, 'cells': cells})
+
+    return render_template('teacher/mark_attendance_week.html',
+                           subject_class=subject_class,
+                           sessions=sessions,
+                           grid=grid,
+                           holidays_by_date=holidays_by_date,
+                           status_choices=ATTENDANCE_STATUS_CHOICES,
+                           week_start=week_start,
+                           week_end=week_end,
+                           prev_week_str=(week_start - timedelta(days=7)).strftime('%Y-%m-%d'),
+                           next_week_str=(week_start + timedelta(days=7)).strftime('%Y-%m-%d'),
+                           title=f"Weekly Attendance for {subject_class.name}")
+
+
+def parse_date_range_args():
+    """Reads the optional start_date/end_date (YYYY-MM-DD) query args. Raises ValueError if either is malformed."""
+    start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+    end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+    return start_date, end_date
 
 # --- class_attendance_report route ---
 @teacher.route('/class/<int:class_id>/attendance-report')
@@ -206,36 +340,29 @@ def class_attendance_report(class_id):
         else:
             return redirect(url_for('main.dashboard'))
 
+    try:
+        start_date, end_date = parse_date_range_args()
+    except ValueError:
+        flash("Invalid report date range, showing all recorded sessions.", "warning")
+        start_date, end_date = None, None
+
+    etag = page_etag(class_attendance_validator(class_id, start_date, end_date))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
     enrolled_students = subject_class.students_enrolled.filter(Student.is_active==True).order_by(Student.last_name, Student.first_name).all()
-    all_attendance_records = Attendance.query.filter_by(subject_class_id=class_id).all()
 
-    student_summary_data = {}
-    for student in enrolled_students:
-        student_summary_data[student.id] = {
-            'student_obj': student,
-            'total_present': 0, 'total_absent': 0, 'total_late': 0, 'total_excused': 0,
-            'total_public_holiday': 0, 'total_school_holiday': 0, 
-            'total_sessions_recorded': 0
-        }
-
-    unique_class_session_dates = db.session.query(Attendance.date).filter_by(subject_class_id=class_id).distinct().count()
-
-    for record in all_attendance_records:
-        if record.student_id in student_summary_data:
-            summary = student_summary_data[record.student_id]
-            summary['total_sessions_recorded'] += 1
-            if record.status == 'present': summary['total_present'] += 1
-            elif record.status == 'absent': summary['total_absent'] += 1
-            elif record.status == 'late': summary['total_late'] += 1
-            elif record.status == 'excused': summary['total_excused'] += 1
-            elif record.status == 'public_holiday': summary['total_public_holiday'] += 1
-            elif record.status == 'school_holiday': summary['total_school_holiday'] += 1
+    student_summary_data = build_class_report_summaries(class_id, enrolled_students, start_date, end_date)
+    unique_class_session_dates = count_recorded_session_dates(class_id, start_date, end_date)
     
-    return render_template('teacher/class_attendance_report.html',
+    return with_etag(render_template('teacher/class_attendance_report.html',
                            subject_class=subject_class,
-                           student_summary_data=student_summary_data.values(), 
+                           student_summary_data=student_summary_data, 
                            unique_class_session_dates=unique_class_session_dates,
-                           title=f"Attendance Report for {subject_class.name}")
+                           report_start_date=start_date,
+                           report_end_date=end_date,
+                           title=f"Attendance Report for {subject_class.name}"), etag)
 
 # --- view_all_holidays route ---
 @teacher.route('/holidays')
@@ -243,23 +370,14 @@ def class_attendance_report(class_id):
 @teacher_required # This page is fine to be teacher-specific or could be moved to main
 def view_all_holidays():
     year = request.args.get('year', default=date.today().year, type=int)
-    holidays_for_year = Holiday.query.filter(
-        db.extract('year', Holiday.date) == year
-    ).order_by(Holiday.date.asc()).all()
-    
-    available_years_query = db.session.query(db.extract('year', Holiday.date).label('year')).distinct().order_by(db.desc('year'))
-    available_years = [y.year for y in available_years_query.all()]
+    holiday_calendar = get_holiday_calendar()
+    available_years = holiday_calendar.years()
 
-    if not available_years and not holidays_for_year : 
-        available_years = [date.today().year] 
-    elif year not in available_years and available_years: 
-         if date.today().year in available_years: 
-            year = date.today().year
-         else: 
-            year = available_years[0] if available_years else date.today().year
-         holidays_for_year = Holiday.query.filter(
-            db.extract('year', Holiday.date) == year
-         ).order_by(Holiday.date.asc()).all()
+    if not available_years:
+        available_years = [date.today().year]
+    elif year not in available_years:
+        year = date.today().year if date.today().year in available_years else available_years[0]
+    holidays_for_year = holiday_calendar.for_year(year)
 
     return render_template('teacher/all_holidays.html', 
                            holidays=holidays_for_year, 
@@ -269,38 +387,10 @@ def view_all_holidays():
 
 # --- monthly_class_attendance_matrix route ---
 def get_scheduled_class_dates_for_month(subject_class, year, month):
-    scheduled_dates = []
-    if not subject_class.schedule_details:
-        # Fallback or integrate with ClassSchedule model if it's populated
-        # For now, simple parsing of schedule_details
-        single_scheduled_day_int = parse_scheduled_day(subject_class.schedule_details)
-        if single_scheduled_day_int is None:
-            current_app.logger.warning(f"Could not determine scheduled weekdays for class {subject_class.id} from '{subject_class.schedule_details}' for monthly matrix.")
-            return []
-        scheduled_weekdays = [single_scheduled_day_int]
-    else: # More robust parsing if schedule_details can contain multiple days
-        day_map_str_to_int = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
-        scheduled_weekdays = []
-        details_lower = subject_class.schedule_details.lower()
-        for day_str, day_int in day_map_str_to_int.items():
-            if day_str in details_lower:
-                scheduled_weekdays.append(day_int)
-        if not scheduled_weekdays: # Fallback if complex parsing fails
-             single_scheduled_day_int = parse_scheduled_day(subject_class.schedule_details)
-             if single_scheduled_day_int is not None: scheduled_weekdays.append(single_scheduled_day_int)
-             else:
-                current_app.logger.warning(f"Could not determine scheduled weekdays for class {subject_class.id} from '{subject_class.schedule_details}' for monthly matrix (complex parse failed).")
-                return []
-
-    num_days_in_month = calendar.monthrange(year, month)[1]
-    for day_num in range(1, num_days_in_month + 1):
-        try:
-            current_date = date(year, month, day_num)
-            if current_date.weekday() in scheduled_weekdays:
-                scheduled_dates.append(current_date)
-        except ValueError: 
-            continue
-    return sorted(list(set(scheduled_dates))) 
+    # Holiday dates are kept so public/school holiday statuses show in the matrix
+    first_day = date(year, month, 1)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    return get_class_schedule(subject_class).session_dates_between(first_day, last_day, skip_holidays=False)
 
 @teacher.route('/class/<int:class_id>/attendance/monthly', methods=['GET'])
 @login_required
@@ -340,26 +430,18 @@ def monthly_class_attendance_matrix(class_id):
         month = date.today().month
         flash("Invalid month/year parameters, defaulting to current.", "warning")
 
+    etag = page_etag(class_attendance_validator(
+        class_id, date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+    ))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
     class_session_dates = get_scheduled_class_dates_for_month(subject_class, year, month)
     enrolled_students = subject_class.students_enrolled.filter(Student.is_active==True).order_by(Student.last_name, Student.first_name).all()
     
-    attendance_records_query = Attendance.query.filter(
-        Attendance.subject_class_id == class_id,
-        Attendance.student_id.in_([s.id for s in enrolled_students] if enrolled_students else []),
-        Attendance.date.in_(class_session_dates) if class_session_dates else []
-    ).all()
-
-    attendance_matrix = defaultdict(dict)
-    for record in attendance_records_query:
-        attendance_matrix[record.student_id][record.date] = record.status
-
-    students_attendance_data = []
-    for student in enrolled_students:
-        student_data = {'student': student, 'attendance_by_date': {}}
-        for session_date in class_session_dates:
-            status = attendance_matrix[student.id].get(session_date, '') 
-            student_data['attendance_by_date'][session_date] = status
-        students_attendance_data.append(student_data)
+    # Dense student x date grid of small status codes, built from (student_id, date, status) tuples only
+    attendance_matrix = build_attendance_matrix(class_id, enrolled_students, class_session_dates)
 
     current_month_date = date(year, month, 1)
     prev_month_date = current_month_date - timedelta(days=1) 
@@ -388,10 +470,12 @@ def monthly_class_attendance_matrix(class_id):
         available_years.append(year)
         available_years.sort()
 
-    return render_template('teacher/monthly_attendance_matrix.html',
+    return with_etag(render_template('teacher/monthly_attendance_matrix.html',
                            subject_class=subject_class,
-                           students_data=students_attendance_data,
+                           attendance_matrix=attendance_matrix,
+                           matrix_statuses=MATRIX_STATUSES,
                            class_session_dates=class_session_dates,
+                           session_date_labels=[d.strftime('%Y-%m-%d') for d in class_session_dates],
                            selected_year=year,
                            selected_month=month,
                            month_name=calendar.month_name[month],
@@ -399,4 +483,170 @@ def monthly_class_attendance_matrix(class_id):
                            next_month_nav=next_month,
                            available_years=available_years,
                            calendar=calendar,
-                           title=f"Monthly Attendance: {subject_class.name}")
+                           title=f"Monthly Attendance: {subject_class.name}"), etag)
+
+# --- Date-range (term) attendance matrix ---
+MATRIX_MAX_RANGE_DAYS = 731 # Two years of session dates at most
+
+def get_matrix_date_range(subject_class, notify=True):
+    """
+    The requested matrix date range, defaulting to the class term (or the current year) and capped at two years.
+    With notify=False (downloads, where a flash would only show up on some later page) nothing is
+    flashed and a malformed date raises ValueError instead of falling back to the term.
+    """
+    today = date.today()
+    default_start = subject_class.start_date or date(today.year, 1, 1)
+    default_end = subject_class.end_date or date(today.year, 12, 31)
+    try:
+        start_date, end_date = parse_date_range_args()
+    except ValueError:
+        if not notify:
+            raise
+        flash("Invalid date range, showing the class term instead.", "warning")
+        start_date, end_date = None, None
+    start_date, end_date = start_date or default_start, end_date or default_end
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
+    if (end_date - start_date).days > MATRIX_MAX_RANGE_DAYS:
+        end_date = start_date + timedelta(days=MATRIX_MAX_RANGE_DAYS)
+        if notify:
+            flash(f"Date range shortened to end on {end_date.strftime('%Y-%m-%d')} (two years at most).", "warning")
+    return start_date, end_date
+
+@teacher.route('/class/<int:class_id>/attendance/matrix', methods=['GET'])
+@login_required
+def class_attendance_range_matrix(class_id):
+    subject_class = SubjectClass.query.options(
+        db.joinedload(SubjectClass.subject_taught),
+        db.joinedload(SubjectClass.teacher_user)
+    ).get_or_404(class_id)
+
+    if not current_user.can_manage_class(subject_class):
+        flash("You are not authorized to view this attendance matrix.", "danger")
+        if current_user.is_teacher:
+            return redirect(url_for('teacher.my_classes'))
+        return redirect(url_for('main.dashboard'))
+
+    # Defaults to the whole class term; falls back to the current calendar year
+    start_date, end_date = get_matrix_date_range(subject_class)
+    etag = page_etag(class_attendance_validator(class_id, start_date, end_date))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
+    dates_per_window = current_app.config.get('MATRIX_DATES_PER_WINDOW', 20)
+    students_per_page = current_app.config.get('MATRIX_STUDENTS_PER_PAGE', 50)
+
+    # Session dates are resolved in memory; only the visible column window is queried
+    all_session_dates = get_class_schedule(subject_class).session_dates_between(start_date, end_date, skip_holidays=False)
+    date_offset = max(0, request.args.get('date_offset', default=0, type=int))
+    if date_offset >= len(all_session_dates):
+        date_offset = max(0, len(all_session_dates) - dates_per_window)
+    window_dates = all_session_dates[date_offset:date_offset + dates_per_window]
+
+    students, has_previous_students, has_next_students = student_keyset_page(
+        subject_class, students_per_page,
+        after_id=request.args.get('after', type=int),
+        before_id=request.args.get('before', type=int)
+    )
+    attendance_matrix = build_attendance_matrix(class_id, students, window_dates, filter_students=True)
+
+    # Paging one axis keeps the other in place, so each link carries the current position of both
+    range_args = {'class_id': class_id, 'start_date': start_date.strftime('%Y-%m-%d'), 'end_date': end_date.strftime('%Y-%m-%d')}
+    student_position = {key: request.args.get(key, type=int) for key in ('after', 'before') if request.args.get(key, type=int)}
+    matrix_nav = {
+        'previous_dates': url_for('teacher.class_attendance_range_matrix', **range_args, **student_position,
+                                  date_offset=max(0, date_offset - dates_per_window)) if date_offset > 0 else None,
+        'next_dates': url_for('teacher.class_attendance_range_matrix', **range_args, **student_position,
+                              date_offset=date_offset + dates_per_window) if date_offset + dates_per_window < len(all_session_dates) else None,
+        'previous_students': url_for('teacher.class_attendance_range_matrix', **range_args, date_offset=date_offset,
+                                     before=students[0].id) if has_previous_students and students else None,
+        'next_students': url_for('teacher.class_attendance_range_matrix', **range_args, date_offset=date_offset,
+                                 after=students[-1].id) if has_next_students and students else None,
+    }
+
+    return with_etag(render_template('teacher/attendance_range_matrix.html',
+                           subject_class=subject_class,
+                           attendance_matrix=attendance_matrix,
+                           matrix_statuses=MATRIX_STATUSES,
+                           class_session_dates=window_dates,
+                           session_date_labels=[d.strftime('%Y-%m-%d') for d in window_dates],
+                           total_session_dates=len(all_session_dates),
+                           date_offset=date_offset,
+                           dates_per_window=dates_per_window,
+                           start_date=start_date,
+                           end_date=end_date,
+                           matrix_nav=matrix_nav,
+                           title=f"Attendance Matrix: {subject_class.name}"), etag)
+
+
+# --- CSV exports ---
+def _export_date_label(start_date, end_date):
+    if not (start_date or end_date):
+        return 'all'
+    return f"{start_date.strftime('%Y%m%d') if start_date else 'start'}-{end_date.strftime('%Y%m%d') if end_date else 'latest'}"
+
+def _get_exportable_class(class_id):
+    """Returns the class if the current user may export it, otherwise None (after flashing why)."""
+    subject_class = SubjectClass.query.get_or_404(class_id)
+    if not current_user.can_manage_class(subject_class):
+        flash("You are not authorized to export attendance for this class.", "danger")
+        return None
+    return subject_class
+
+def _unauthorized_export_redirect():
+    if current_user.is_teacher:
+        return redirect(url_for('teacher.my_classes'))
+    return redirect(url_for('main.dashboard'))
+
+@teacher.route('/class/<int:class_id>/attendance/export.csv')
+@login_required
+def export_class_attendance_csv(class_id):
+    """Every attendance record of the class, optionally for a start_date/end_date range."""
+    subject_class = _get_exportable_class(class_id)
+    if subject_class is None:
+        return _unauthorized_export_redirect()
+    try:
+        start_date, end_date = parse_date_range_args()
+    except ValueError:
+        flash("Invalid export date range.", "warning")
+        return redirect(url_for('teacher.class_attendance_report', class_id=class_id))
+    return streamed_csv_response(
+        attendance_records_csv(start_date, end_date, subject_class_id=class_id),
+        f"attendance_{subject_class.name}_{_export_date_label(start_date, end_date)}.csv"
+    )
+
+@teacher.route('/class/<int:class_id>/attendance-report/export.csv')
+@login_required
+def export_class_report_csv(class_id):
+    subject_class = _get_exportable_class(class_id)
+    if subject_class is None:
+        return _unauthorized_export_redirect()
+    try:
+        start_date, end_date = parse_date_range_args()
+    except ValueError:
+        flash("Invalid export date range.", "warning")
+        return redirect(url_for('teacher.class_attendance_report', class_id=class_id))
+    enrolled_students = subject_class.students_enrolled.filter(Student.is_active==True).order_by(Student.last_name, Student.first_name).all()
+    return streamed_csv_response(
+        class_report_csv(build_class_report_summaries(class_id, enrolled_students, start_date, end_date)),
+        f"attendance_report_{subject_class.name}_{_export_date_label(start_date, end_date)}.csv"
+    )
+
+@teacher.route('/class/<int:class_id>/attendance/matrix/export.csv')
+@login_required
+def export_class_matrix_csv(class_id):
+    """The attendance matrix for a date range (default: the class term), one column per session date."""
+    subject_class = _get_exportable_class(class_id)
+    if subject_class is None:
+        return _unauthorized_export_redirect()
+    try:
+        start_date, end_date = get_matrix_date_range(subject_class, notify=False)
+    except ValueError:
+        flash("Invalid export date range.", "warning")
+        return redirect(url_for('teacher.class_attendance_range_matrix', class_id=class_id))
+    session_dates = get_class_schedule(subject_class).session_dates_between(start_date, end_date, skip_holidays=False)
+    return streamed_csv_response(
+        attendance_matrix_csv(subject_class, session_dates),
+        f"attendance_matrix_{subject_class.name}_{_export_date_label(start_date, end_date)}.csv"
+    )
@@ -0,0 +1,152 @@
+# app/timetable.py
+"""
+The weekly school timetable grid.
+
+Schedules are loaded as plain rows (one query, names joined in) and dropped into
+(weekday, hour) buckets in a single pass: a schedule goes into the hourly slot
+its start time falls in, keyed by the slot's precomputed 'HH:MM' label, with a
+rowspan of its duration rounded to whole hours. Schedules starting outside the
+displayed hours are left out, as before.
+
+Built weeks are kept per worker, keyed by week start, together with the week's
+holidays. A cached week is rebuilt once the 'schedules', 'holidays' or
+'class_pages' generation moves on, i.e. after classes, their schedules,
+holidays, or the subject/teacher names shown change. Everything that depends
+on the viewer or the current time is left to the request.
+"""
+from datetime import timedelta
+from flask import current_app, url_for
+from app import db
+from app.models import ClassSchedule, SubjectClass, Subject, User, DAYS_OF_WEEK
+from app.cache_utils import current_generation
+from app.holiday_calendar import HOLIDAY_CACHE_NAME, get_holiday_calendar
+from app.schedule_resolver import SCHEDULE_CACHE_NAME
+from app.conditional_get import CLASS_PAGES_CACHE_NAME
+
+TIMETABLE_START_HOUR = 8
+TIMETABLE_END_HOUR = 18 # Exclusive: the last slot is 17:00 - 18:00
+
+
+def timetable_slots():
+    """(hour, 'HH:MM' key, 'HH:MM - HH:MM' label) for each displayed hourly slot."""
+    return [
+        (hour, f"{hour:02d}:00", f"{hour:02d}:00 - {(hour + 1) % 24:02d}:00")
+        for hour in range(TIMETABLE_START_HOUR, TIMETABLE_END_HOUR)
+    ]
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def schedule_rowspan(start_time, end_time):
+    """Number of hourly rows a session covers: its duration rounded to whole hours, at least 1."""
+    duration_seconds = (_seconds(end_time) - _seconds(start_time)) % (24 * 3600) # Sessions may run past midnight
+    return max(1, int(round(duration_seconds / 3600.0)))
+
+
+def fetch_week_schedule_rows(start_of_week, end_of_week):
+    """ClassSchedule rows of classes running at some point in the week, with class, subject and teacher names."""
+    return db.session.query(
+        ClassSchedule.id, ClassSchedule.day_of_week, ClassSchedule.start_time, ClassSchedule.end_time,
+        ClassSchedule.location, SubjectClass.id.label('class_id'), SubjectClass.name.label('class_name'),
+        Subject.name.label('subject_name'), User.id.label('teacher_id'), User.first_name.label('teacher_first_name'),
+        User.last_name.label('teacher_last_name')
+    ).join(SubjectClass, ClassSchedule.subject_class_id == SubjectClass.id
+    ).outerjoin(Subject, SubjectClass.subject_id == Subject.id
+    ).outerjoin(User, SubjectClass.teacher_user_id == User.id
+    ).filter(
+        SubjectClass.start_date <= end_of_week,
+        SubjectClass.end_date >= start_of_week
+    ).order_by(ClassSchedule.day_of_week, ClassSchedule.start_time, ClassSchedule.id).all()
+
+
+def build_timetable_grid(schedule_rows):
+    """
+    {weekday: {'HH:MM' slot key: [entry, ...]}} for every day (Monday == 0) and displayed slot.
+    Entries keep the order of `schedule_rows`, which should be sorted by start time.
+    """
+    slot_keys = {hour: key for hour, key, _ in timetable_slots()}
+    grid = {weekday: {key: [] for key in slot_keys.values()} for weekday in range(len(DAYS_OF_WEEK))}
+    skipped = 0
+
+    for row in schedule_rows:
+        if row.day_of_week not in grid:
+            current_app.logger.warning(
+                "TIMETABLE_VIEW: Schedule %s for class '%s' has invalid day_of_week %r (expected 0-6).",
+                row.id, row.class_name, row.day_of_week
+            )
+            continue
+        slot_key = slot_keys.get(row.start_time.hour)
+        if slot_key is None:
+            skipped += 1
+            continue
+        grid[row.day_of_week][slot_key].append({
+            'id': row.id, 'class_id': row.class_id,
+            'class_name': row.class_name,
+            'subject_name': row.subject_name,
+            'teacher_name': f"{row.teacher_first_name} {row.teacher_last_name}" if row.teacher_id is not None else "N/A",
+            'start_time_str': row.start_time.strftime('%H:%M'),
+            'end_time_str': row.end_time.strftime('%H:%M'),
+            'location': row.location or "N/A",
+            'rowspan': schedule_rowspan(row.start_time, row.end_time),
+        })
+
+    current_app.logger.debug(
+        "TIMETABLE_VIEW: Bucketed %d schedules (%d outside displayed hours)", len(schedule_rows), skipped
+    )
+    return grid
+
+
+def build_week_timetable(start_of_week, end_of_week):
+    """
+    The week laid out for the timetable page: a header per day and, per hourly
+    slot, one cell per day with its entries and rowspan (that of a lone entry).
+    Each entry carries the URL for marking its class's attendance that day.
+    """
+    holiday_calendar = get_holiday_calendar()
+    grid = build_timetable_grid(fetch_week_schedule_rows(start_of_week, end_of_week))
+    days = []
+    for day_index, day_name in enumerate(DAYS_OF_WEEK):
+        day_date = start_of_week + timedelta(days=day_index)
+        date_str = day_date.strftime('%Y-%m-%d')
+        for entries in grid[day_index].values():
+            for entry in entries:
+                entry['mark_attendance_url'] = url_for('teacher.mark_attendance', class_id=entry['class_id'], attendance_date=date_str)
+        days.append({
+            'name': day_name, 'date': day_date, 'date_label': day_date.strftime('%d %b'),
+            'title_date': day_date.strftime('%b %d'), 'holiday': holiday_calendar.get(day_date),
+        })
+    rows = []
+    for hour, slot_key, label in timetable_slots():
+        cells = []
+        for day_index in range(len(DAYS_OF_WEEK)):
+            entries = grid[day_index][slot_key]
+            cells.append({'entries': entries, 'rowspan': entries[0]['rowspan'] if len(entries) == 1 else 1})
+        rows.append({'hour': hour, 'label': label, 'cells': cells})
+    return {'days': days, 'rows': rows}
+
+
+def get_week_timetable(start_of_week, end_of_week):
+    """
+    build_week_timetable() for the week, from this worker's cache while the
+    schedule, holiday and class page generations are unchanged. At most
+    TIMETABLE_CACHE_MAX_WEEKS weeks are kept.
+    """
+    max_weeks = current_app.config['TIMETABLE_CACHE_MAX_WEEKS']
+    if max_weeks <= 0:
+        return build_week_timetable(start_of_week, end_of_week)
+    generations = tuple(current_generation(name) for name in (SCHEDULE_CACHE_NAME, HOLIDAY_CACHE_NAME, CLASS_PAGES_CACHE_NAME))
+    cache = current_app.extensions.setdefault('timetable_weeks', {})
+    cached = cache.get(start_of_week)
+    if cached is not None and cached[0] == generations:
+        return cached[1]
+
+    week = build_week_timetable(start_of_week, end_of_week)
+    if any(entry[0] != generations for entry in cache.values()):
+        cache.clear() # Every other week was built from the same, now stale, data
+    cache.pop(start_of_week, None)
+    while len(cache) >= max_weeks:
+        cache.pop(next(iter(cache))) # Oldest first
+    cache[start_of_week] = (generations, week)
+    return week
@@ -27,6 +27,38 @@ class Config:
     DEFAULT_ADMIN_PASSWORD = os.environ.get('DEFAULT_ADMIN_PASSWORD') or 'adminpass'
     DEFAULT_ADMIN_EMAIL = os.environ.get('DEFAULT_ADMIN_EMAIL') or 'admin@example.com'
 
+    # JSON attendance API (tablets, SIS sync): largest batch accepted in one request
+    ATTENDANCE_API_MAX_ENTRIES = int(os.environ.get('ATTENDANCE_API_MAX_ENTRIES') or 5000)
+    # How long applied offline-sync idempotency keys are remembered (see `flask prune_sync_keys`)
+    ATTENDANCE_SYNC_KEY_RETENTION_DAYS = int(os.environ.get('ATTENDANCE_SYNC_KEY_RETENTION_DAYS') or 30)
+
+    # Window size of the date-range attendance matrix: students per page and session dates per column window
+    MATRIX_STUDENTS_PER_PAGE = int(os.environ.get('MATRIX_STUDENTS_PER_PAGE') or 50)
+    MATRIX_DATES_PER_WINDOW = int(os.environ.get('MATRIX_DATES_PER_WINDOW') or 20)
+
+    # Records per page of a student's attendance history (the JSON endpoint accepts ?per_page= up to the max)
+    STUDENT_HISTORY_PER_PAGE = int(os.environ.get('STUDENT_HISTORY_PER_PAGE') or 50)
+    STUDENT_HISTORY_MAX_PER_PAGE = int(os.environ.get('STUDENT_HISTORY_MAX_PER_PAGE') or 500)
+
+    # Weeks of built school timetable each worker keeps (0 = rebuild on every load)
+    TIMETABLE_CACHE_MAX_WEEKS = int(os.environ.get('TIMETABLE_CACHE_MAX_WEEKS') or 104)
+
+    # Days of past and upcoming sessions included in the .ics timetable feeds
+    CALENDAR_FEED_PAST_DAYS = int(os.environ.get('CALENDAR_FEED_PAST_DAYS') or 28)
+    CALENDAR_FEED_FUTURE_DAYS = int(os.environ.get('CALENDAR_FEED_FUTURE_DAYS') or 182)
+
+    # Seconds each worker reuses the admin dashboard's headline numbers (0 = recompute on every load)
+    ADMIN_DASHBOARD_STATS_TTL = float(os.environ.get('ADMIN_DASHBOARD_STATS_TTL') or 5)
+
+    # Processes per web worker that render queued PDF reports (see app/pdf_reports.py)
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS') or 2)
+
+    # Chronic-absence flag (see app/absence_monitor.py): absence rate over the last N school days,
+    # ignoring students with fewer recorded sessions than the minimum in that window
+    CHRONIC_ABSENCE_WINDOW_DAYS = int(os.environ.get('CHRONIC_ABSENCE_WINDOW_DAYS') or 20)
+    CHRONIC_ABSENCE_THRESHOLD = float(os.environ.get('CHRONIC_ABSENCE_THRESHOLD') or 0.1)
+    CHRONIC_ABSENCE_MIN_SESSIONS = int(os.environ.get('CHRONIC_ABSENCE_MIN_SESSIONS') or 5)
+
     # Optional: Define UPLOAD_FOLDER if you plan to handle file uploads and save them
     # UPLOAD_FOLDER = os.path.join(basedir, 'uploads') # For local
     # Or for Docker: UPLOAD_FOLDER = '/app/uploads_volume' (and mount a volume)
@@ -1,10 +1,11 @@
 # run.py
 
 import os
+import click
 from app import create_app, db # Import create_app factory and db instance
 # Import all models and enums that you want available in flask shell
 #from app.models import User, UserRole, Subject, SubjectClass, Student, Attendance, AttendanceStatus, enrollments 
-from app.models import User, UserRole, Subject, SubjectClass, Student, Attendance, enrollments, ATTENDANCE_STATUS_CHOICES # Optionally import the new list
+from app.models import User, UserRole, Subject, SubjectClass, Student, Attendance, AttendanceSummary, DailyAttendanceRollup, AttendanceSyncKey, ReportJob, enrollments, ATTENDANCE_STATUS_CHOICES # Optionally import the new list
 from flask_migrate import Migrate 
 
 # Get the configuration name from environment variable or use default
@@ -62,6 +63,110 @@ def create_admin_command():
         db.session.rollback()
         print(f"Error creating admin user: {e}")
 
+@app.cli.command("issue_api_token")
+@click.argument("username")
+def issue_api_token_command(username):
+    """Issues a new JSON API token for USERNAME, revoking any previous one.
+    The token is printed once; only its hash is stored.
+    """
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        print(f"User '{username}' not found.")
+        return
+    token = user.generate_api_token()
+    try:
+        db.session.commit()
+        print(f"API token for '{username}' (store it now, it will not be shown again):")
+        print(token)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error issuing API token: {e}")
+
+@app.cli.command("revoke_api_token")
+@click.argument("username")
+def revoke_api_token_command(username):
+    """Revokes the JSON API token of USERNAME."""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        print(f"User '{username}' not found.")
+        return
+    user.api_token_hash = None
+    db.session.commit()
+    print(f"API token for '{username}' revoked.")
+
+@app.cli.command("revoke_calendar_feeds")
+@click.argument("username")
+def revoke_calendar_feeds_command(username):
+    """Revokes every calendar feed URL issued to USERNAME."""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        print(f"User '{username}' not found.")
+        return
+    user.revoke_calendar_feeds()
+    db.session.commit()
+    print(f"Calendar feed links for '{username}' revoked.")
+
+@app.cli.command("prune_sync_keys")
+def prune_sync_keys_command():
+    """Deletes offline-sync idempotency keys older than ATTENDANCE_SYNC_KEY_RETENTION_DAYS."""
+    from datetime import datetime, timedelta # Keep import local to command
+    retention_days = app.config.get('ATTENDANCE_SYNC_KEY_RETENTION_DAYS', 30)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = AttendanceSyncKey.query.filter(AttendanceSyncKey.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    print(f"Deleted {deleted} sync key(s) older than {retention_days} days.")
+
+@app.cli.command("rebuild_attendance_summaries")
+def rebuild_attendance_summaries_command():
+    """Recomputes the per-student attendance summary counts from the attendance records."""
+    from app.attendance_service import rebuild_attendance_summaries # Keep import local to command
+    try:
+        rebuilt = rebuild_attendance_summaries()
+        db.session.commit()
+        print(f"Rebuilt {rebuilt} attendance summary row(s).")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error rebuilding attendance summaries: {e}")
+
+@app.cli.command("backfill_daily_rollup")
+@click.option("--start-date", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="First date to rebuild (default: all dates).")
+@click.option("--end-date", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="Last date to rebuild (default: all dates).")
+def backfill_daily_rollup_command(start_date, end_date):
+    """Recomputes the daily per-class attendance rollup from the attendance records."""
+    from app.attendance_service import rebuild_daily_rollup # Keep import local to command
+    try:
+        rebuilt = rebuild_daily_rollup(start_date.date() if start_date else None, end_date.date() if end_date else None)
+        db.session.commit()
+        print(f"Rebuilt {rebuilt} daily attendance rollup row(s).")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error rebuilding daily attendance rollup: {e}")
+
+@app.cli.command("run_report_jobs")
+def run_report_jobs_command():
+    """Renders every queued PDF report job on the process pool (e.g. jobs left queued by a restarted web worker)."""
+    from app.pdf_reports import submit_report_job # Keep import local to command
+    job_ids = [job.id for job in ReportJob.query.filter_by(status='queued').order_by(ReportJob.id)]
+    futures = {job_id: submit_report_job(job_id) for job_id in job_ids}
+    for job_id, future in futures.items():
+        try:
+            print(f"Report job {job_id}: {future.result() or 'already taken by another worker'}")
+        except Exception as e:
+            print(f"Report job {job_id}: error {e}")
+    print(f"Processed {len(job_ids)} queued report job(s).")
+
+@app.cli.command("update_absence_flags")
+def update_absence_flags_command():
+    """Re-evaluates every student's chronic-absence flag over the rolling window. Run daily."""
+    from app.absence_monitor import update_chronic_absence_flags # Keep import local to command
+    try:
+        flagged, cleared = update_chronic_absence_flags()
+        db.session.commit()
+        print(f"Chronic-absence flags updated: {flagged} flagged, {cleared} cleared.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating chronic-absence flags: {e}")
+
 # This makes these items available in 'flask shell' without explicit imports
 @app.shell_context_processor
 def make_shell_context():
@@ -73,6 +178,9 @@ def make_shell_context():
         'SubjectClass': SubjectClass,
         'Student': Student,
         'Attendance': Attendance,
+        'AttendanceSummary': AttendanceSummary,
+        'DailyAttendanceRollup': DailyAttendanceRollup,
+        'ReportJob': ReportJob,
         'ATTENDANCE_STATUS_CHOICES': ATTENDANCE_STATUS_CHOICES, # Optionally add the new list
         #'AttendanceStatus': AttendanceStatus, # ADDED/VERIFIED: Enum for attendance status
         'enrollments': enrollments # Association table
@@ -0,0 +1,41 @@
+# scripts/bench_attendance_save.py
+"""
+Times saving a class attendance sheet and counts its SQL statements for several
+class sizes: a first submission (every row inserted), a re-submission with every
+status changed (every row updated) and an unchanged re-submission.
+
+    python scripts/bench_attendance_save.py [class size ...]
+"""
+import sys
+from bench_utils import make_app, seed_school, login, best_of
+
+SHEET_DATE = '2025-03-03'
+
+
+def sheet_data(student_ids, status):
+    data = {'attendance_date': SHEET_DATE}
+    for student_id in student_ids:
+        data[f'status-{student_id}'] = status
+        data[f'remarks-{student_id}'] = ''
+    return data
+
+
+def bench(n_students):
+    app = make_app()
+    _, (class_id,), student_ids = seed_school(app, n_students)
+    url = f'/teacher/class/{class_id}/attendance/mark'
+    client = app.test_client()
+    login(client, 'teacher')
+    client.get(url) # Warm the per-worker schedule and holiday caches
+
+    results = {'insert': best_of(app, lambda: client.post(url, data=sheet_data(student_ids, 'present')), repeat=1)}
+    statuses = iter(['absent', 'late'] * 5) # Ends on 'absent'
+    results['update'] = best_of(app, lambda: client.post(url, data=sheet_data(student_ids, next(statuses))))
+    results['unchanged'] = best_of(app, lambda: client.post(url, data=sheet_data(student_ids, 'absent')))
+    for label, (elapsed, queries, response) in results.items():
+        assert response.status_code in (200, 302), response.status_code
+        print(f"{n_students:>6} students  {label:<10} {queries:>4} queries  {elapsed:8.1f} ms")
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [45, 200, 1000]:
+        bench(size)
@@ -0,0 +1,35 @@
+# scripts/bench_attendance_sheet.py
+"""
+Times rendering the mark-attendance sheet and parsing a posted sheet for
+several class sizes. The posted sheet matches what is stored, so the save
+itself writes nothing and the timing is mostly form handling and templating.
+
+    python scripts/bench_attendance_sheet.py [class size ...]
+"""
+import sys
+from bench_utils import make_app, seed_school, login, best_of
+
+SHEET_DATE = '2025-03-03'
+
+
+def bench(n_students):
+    app = make_app()
+    _, (class_id,), student_ids = seed_school(app, n_students)
+    url = f'/teacher/class/{class_id}/attendance/mark'
+    data = {'attendance_date': SHEET_DATE}
+    for student_id in student_ids:
+        data[f'status-{student_id}'] = 'late'
+        data[f'remarks-{student_id}'] = '' # Blank, stored as NULL: re-posting it is not a change
+    client = app.test_client()
+    login(client, 'teacher')
+    client.post(url, data=data)
+
+    render = best_of(app, lambda: client.get(url, query_string={'attendance_date': SHEET_DATE}))
+    save = best_of(app, lambda: client.post(url, data=data))
+    for label, (elapsed, queries, response) in (('GET', render), ('POST', save)):
+        assert response.status_code in (200, 302), response.status_code
+        print(f"{n_students:>6} students  {label:<5} {queries:>4} queries  {elapsed:8.1f} ms")
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [40, 200, 1000]:
+        bench(size)
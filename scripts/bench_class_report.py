@@ -0,0 +1,90 @@
+# scripts/bench_class_report.py
+"""
+Times the class attendance report for a 40-student class with 200 recorded
+sessions (8,000 records), all-time and for a date range, and counts its queries.
+
+Then compares how the per-student counts are computed, all-time and for the
+date range: the report's original path (every record loaded as an ORM object and
+tallied in Python) against the GROUP BY query it uses now. Each is timed and its
+peak Python memory measured with tracemalloc in a separate, untimed run.
+
+    python scripts/bench_class_report.py [students] [sessions]
+"""
+import random
+import sys
+import tracemalloc
+from collections import Counter
+from datetime import date, timedelta
+from bench_utils import make_app, seed_school, login, best_of
+from app import db
+from app.models import Attendance
+from app.attendance_service import bulk_upsert_attendance, aggregate_class_attendance
+
+STATUS_MIX = ['present'] * 6 + ['absent', 'late', 'excused']
+DATE_RANGE = (date(2024, 1, 1), date(2024, 3, 31))
+
+
+def orm_class_counts(class_id, start_date=None, end_date=None):
+    """The report's original counting: load the class's records as ORM objects and tally statuses per student."""
+    query = Attendance.query.filter_by(subject_class_id=class_id)
+    if start_date:
+        query = query.filter(Attendance.date >= start_date, Attendance.date <= end_date)
+    counts = {}
+    for record in query.all():
+        student_counts = counts.setdefault(record.student_id, Counter())
+        student_counts[record.status] += 1
+        student_counts['total'] += 1
+    return counts
+
+
+def peak_memory_kib(app, fn):
+    """Peak Python memory allocated by one call of fn in a fresh app context, in KiB."""
+    with app.app_context():
+        fn() # Warm up outside the trace
+    tracemalloc.start()
+    try:
+        with app.app_context():
+            fn()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def in_app_context(app, fn, *args):
+    def call():
+        with app.app_context():
+            return fn(*args)
+    return call
+
+
+def bench(n_students, n_sessions):
+    app = make_app()
+    admin_id, (class_id,), student_ids = seed_school(app, n_students)
+    generator = random.Random(3)
+    with app.app_context():
+        bulk_upsert_attendance(({
+            'student_id': student_id, 'subject_class_id': class_id,
+            'date': date(2024, 1, 1) + timedelta(days=day), 'status': generator.choice(STATUS_MIX),
+        } for day in range(n_sessions) for student_id in student_ids), recorded_by_user_id=admin_id)
+        db.session.commit()
+    client = app.test_client()
+    login(client, 'teacher')
+
+    url = f'/teacher/class/{class_id}/attendance-report'
+    date_range_args = {'start_date': DATE_RANGE[0].isoformat(), 'end_date': DATE_RANGE[1].isoformat()}
+    for label, query_string in (('all-time', {}), ('date-range', date_range_args)):
+        elapsed, queries, response = best_of(app, lambda: client.get(url, query_string=query_string), repeat=10)
+        assert response.status_code == 200, response.status_code
+        print(f"{n_students} students x {n_sessions} sessions  {label:<10} {queries:>3} queries  {elapsed:7.1f} ms")
+
+    for label, date_args in (('all-time', ()), ('date-range', DATE_RANGE)):
+        for path, count_fn in (('ORM loop', orm_class_counts), ('GROUP BY', aggregate_class_attendance)):
+            call = in_app_context(app, count_fn, class_id, *date_args)
+            elapsed, _queries, _counts = best_of(app, call, repeat=10)
+            peak = peak_memory_kib(app, lambda: count_fn(class_id, *date_args))
+            print(f"  counts {label:<10} {path:<8}  {elapsed:7.1f} ms  {peak:8.1f} KiB peak")
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:3]]
+    bench(*(sizes + [40, 200][len(sizes):]))
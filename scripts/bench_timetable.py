@@ -0,0 +1,51 @@
+# scripts/bench_timetable.py
+"""
+Times the school timetable page with 2,000 class schedules (500 classes, random
+days, start times, durations and rooms) and counts its queries, once rebuilding
+the week on every request and once served from the per-worker week cache.
+
+    python scripts/bench_timetable.py [schedules]
+"""
+import logging
+import random
+import sys
+from datetime import time
+from bench_utils import make_app, seed_school, login, best_of
+from app import db
+from app.models import ClassSchedule
+
+TIMETABLE_URL = '/timetable?date=2026-10-14'
+
+
+def seed_schedules(class_ids, n_schedules, generator):
+    schedules = []
+    for number in range(n_schedules):
+        start_minute = generator.randint(7, 19) * 60 + generator.choice([0, 15, 30, 45])
+        end_minute = (start_minute + generator.choice([30, 45, 60, 90, 120, 150])) % (24 * 60)
+        schedules.append(ClassSchedule(
+            subject_class_id=class_ids[number % len(class_ids)], day_of_week=generator.randrange(7),
+            start_time=time(start_minute // 60, start_minute % 60), end_time=time(end_minute // 60, end_minute % 60),
+            location=generator.choice([None, 'Room 1', 'Room 2', 'Hall']),
+        ))
+    db.session.add_all(schedules)
+    db.session.commit()
+
+
+def bench(n_schedules):
+    app = make_app()
+    app.logger.setLevel(logging.INFO) # The timetable logs every build at DEBUG
+    _, class_ids, _ = seed_school(app, 5, n_classes=500)
+    with app.app_context():
+        seed_schedules(class_ids, n_schedules, random.Random(7))
+    client = app.test_client()
+    login(client, 'admin')
+
+    for label, max_weeks in (('rebuilt', 0), ('cached', app.config['TIMETABLE_CACHE_MAX_WEEKS'])):
+        app.config['TIMETABLE_CACHE_MAX_WEEKS'] = max_weeks
+        client.get(TIMETABLE_URL)
+        elapsed, queries, response = best_of(app, lambda: client.get(TIMETABLE_URL), repeat=10)
+        assert response.status_code == 200, response.status_code
+        print(f"{n_schedules} schedules  {label:<8} {queries:>3} queries  {elapsed:7.1f} ms")
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,108 @@
+# scripts/bench_utils.py
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Each benchmark builds the app with the 'testing' config (an in-memory SQLite
+database, CSRF off), seeds it, logs in through the test client and then times
+requests while counting the SQL statements sent to the database. Requests run
+outside any app context of the script's own, so each gets a fresh session and
+login lookup exactly as in production.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, UserRole, Subject, SubjectClass, Student, enrollments
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def make_app():
+    """A 'testing' app with its tables created."""
+    app = create_app('testing')
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.instance_path = tempfile.mkdtemp()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+class QueryCounter:
+    """Counts the statements executed on `app`'s engine while active."""
+
+    def __init__(self, app):
+        with app.app_context():
+            self.engine = db.engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+def seed_school(app, n_students, n_classes=1):
+    """
+    An admin ('admin'), a teacher ('teacher') and n_classes classes with the same
+    n_students enrolled. Returns (admin id, class ids, student ids).
+    """
+    with app.app_context():
+        return _seed_school(n_students, n_classes)
+
+
+def _seed_school(n_students, n_classes):
+    admin = User(username='admin', email='admin@example.com', role=UserRole.SUPERUSER, first_name='Ada', last_name='Admin')
+    admin.set_password(BENCH_PASSWORD)
+    teacher = User(username='teacher', email='teacher@example.com', role=UserRole.TEACHER, first_name='Tara', last_name='Teacher')
+    teacher.set_password(BENCH_PASSWORD)
+    subject = Subject(name='Bharatanatyam')
+    db.session.add_all([admin, teacher, subject])
+    db.session.flush()
+
+    classes = [
+        SubjectClass(name=f'Bench Class {number}', subject_id=subject.id, teacher_user_id=teacher.id,
+                     schedule_details='Mon 9am', start_date=date(2024, 1, 1), end_date=date(2030, 12, 31))
+        for number in range(n_classes)
+    ]
+    students = [
+        Student(student_id_number=f'B{number:05d}', first_name=f'Student{number}', last_name=f'Bench{number:05d}')
+        for number in range(n_students)
+    ]
+    db.session.add_all(classes + students)
+    db.session.flush()
+    for subject_class in classes:
+        db.session.execute(enrollments.insert(), [{'student_id': student.id, 'class_id': subject_class.id} for student in students])
+    db.session.commit()
+    return admin.id, [subject_class.id for subject_class in classes], [student.id for student in students]
+
+
+def login(client, username):
+    return client.post('/auth/login', data={'username': username, 'password': BENCH_PASSWORD})
+
+
+def best_of(app, fn, repeat=5):
+    """(fastest wall time in ms, query count of that run, fn's result) over `repeat` calls of fn."""
+    best = None
+    for _ in range(repeat):
+        with QueryCounter(app) as counter:
+            started = time.perf_counter()
+            result = fn()
+            elapsed = (time.perf_counter() - started) * 1000
+        if best is None or elapsed < best[0]:
+            best = (elapsed, counter.count, result)
+    return best
@@ -0,0 +1,91 @@
+# tests/conftest.py
+import tempfile
+from datetime import date
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, UserRole, Subject, SubjectClass, Student, enrollments
+
+TEST_PASSWORD = 'test-password'
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing') # TestingConfig: in-memory SQLite, CSRF off
+    app.instance_path = tempfile.mkdtemp()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_class(app):
+    """Creates a teacher ('teacher') and a class with `n_students` active students enrolled; returns (class id, student ids)."""
+    def make_class(n_students, name='Test Class'):
+        with app.app_context():
+            return _make_class(n_students, name)
+
+    def _make_class(n_students, name):
+        teacher = User.query.filter_by(username='teacher').first()
+        if teacher is None:
+            teacher = User(username='teacher', email='teacher@example.com', role=UserRole.TEACHER, first_name='Tara', last_name='Teacher')
+            teacher.set_password(TEST_PASSWORD)
+            db.session.add(teacher)
+        subject = Subject.query.filter_by(name='Bharatanatyam').first() or Subject(name='Bharatanatyam')
+        db.session.add(subject)
+        db.session.flush()
+        subject_class = SubjectClass(name=name, subject_id=subject.id, teacher_user_id=teacher.id, schedule_details='Mon 9am',
+                                     start_date=date(2024, 1, 1), end_date=date(2030, 12, 31))
+        offset = Student.query.count()
+        students = [
+            Student(student_id_number=f'T{offset + number:05d}', first_name=f'Student{number}', last_name=f'Test{offset + number:05d}')
+            for number in range(n_students)
+        ]
+        db.session.add_all([subject_class] + students)
+        db.session.flush()
+        db.session.execute(enrollments.insert(), [{'student_id': student.id, 'class_id': subject_class.id} for student in students])
+        db.session.commit()
+        return subject_class.id, [student.id for student in students]
+    return make_class
+
+
+def login(client, username):
+    return client.post('/auth/login', data={'username': username, 'password': TEST_PASSWORD})
+
+
+def issue_api_token(app, username):
+    """A fresh JSON API bearer token for `username`."""
+    with app.app_context():
+        token = User.query.filter_by(username=username).first().generate_api_token()
+        db.session.commit()
+    return token
+
+
+class QueryCounter:
+    """Records the SQL statements sent to `app`'s database while active."""
+
+    def __init__(self, app):
+        with app.app_context():
+            self.engine = db.engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
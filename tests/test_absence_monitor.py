@@ -0,0 +1,50 @@
+# tests/test_absence_monitor.py
+from datetime import date, timedelta
+from app import db
+from app.models import Holiday, Student
+from app.absence_monitor import school_days_window
+from app.attendance_service import bulk_upsert_attendance
+from app.holiday_calendar import invalidate_holiday_calendar
+from tests.conftest import QueryCounter, login
+
+FIRST_DAY = date(2025, 3, 3)
+
+
+def record_days(class_id, student_id, statuses):
+    bulk_upsert_attendance([
+        {'student_id': student_id, 'subject_class_id': class_id, 'date': FIRST_DAY + timedelta(days=offset), 'status': status}
+        for offset, status in enumerate(statuses)
+    ], recorded_by_user_id=None)
+    db.session.commit()
+
+
+def test_school_days_window_skips_holidays_in_one_query(app, make_class):
+    class_id, (student_id,) = make_class(1)
+    with app.app_context():
+        record_days(class_id, student_id, ['present'] * 10) # March 3rd to 12th
+        db.session.add(Holiday(name='Hari Raya', date=date(2025, 3, 11), type='Public Holiday'))
+        db.session.commit()
+        invalidate_holiday_calendar()
+        school_days_window(3, as_of=date(2025, 3, 12)) # Load the holiday calendar
+
+        with QueryCounter(app) as counter:
+            window_start = school_days_window(3, as_of=date(2025, 3, 12))
+
+        assert window_start == date(2025, 3, 9) # 12th, 10th and 9th; the 11th is a holiday
+        assert counter.count == 1
+        assert school_days_window(3, as_of=date(2025, 3, 1)) is None
+
+
+def test_saving_a_sheet_flags_chronic_absence_after_commit(app, client, make_class):
+    class_id, (student_id,) = make_class(1)
+    app.config.update(CHRONIC_ABSENCE_WINDOW_DAYS=20, CHRONIC_ABSENCE_THRESHOLD=0.5, CHRONIC_ABSENCE_MIN_SESSIONS=3)
+    with app.app_context():
+        record_days(class_id, student_id, ['absent', 'present']) # March 3rd and 4th
+    login(client, 'teacher')
+
+    response = client.post(f'/teacher/class/{class_id}/attendance/mark', data={
+        'attendance_date': '2025-03-05', f'status-{student_id}': 'absent', f'remarks-{student_id}': ''})
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Student, student_id).is_chronically_absent # 2 of the 3 recorded school days absent
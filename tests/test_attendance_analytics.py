@@ -0,0 +1,26 @@
+# tests/test_attendance_analytics.py
+from datetime import date
+from app import db
+from app.models import Subject
+from app.attendance_analytics import get_attendance_analytics
+from app.attendance_service import bulk_upsert_attendance
+from app.conditional_get import invalidate_class_pages
+
+
+def test_renaming_a_subject_invalidates_cached_analytics(app, make_class):
+    class_id, student_ids = make_class(2)
+    with app.app_context():
+        bulk_upsert_attendance([{'student_id': student_id, 'subject_class_id': class_id, 'date': date(2025, 3, 3), 'status': 'present'}
+                                for student_id in student_ids], recorded_by_user_id=None)
+        db.session.commit()
+        rows, _ = get_attendance_analytics(date(2025, 3, 1), date(2025, 3, 31), 'subject')
+        assert rows[0]['label'] == 'Bharatanatyam'
+        assert get_attendance_analytics(date(2025, 3, 1), date(2025, 3, 31), 'subject')[1] # Served from cache
+
+        Subject.query.one().name = 'Carnatic Vocal'
+        db.session.commit()
+        invalidate_class_pages()
+
+        rows, served_from_cache = get_attendance_analytics(date(2025, 3, 1), date(2025, 3, 31), 'subject')
+        assert not served_from_cache
+        assert rows[0]['label'] == 'Carnatic Vocal'
@@ -0,0 +1,73 @@
+# tests/test_attendance_api.py
+from datetime import date
+from app.models import Attendance, AttendanceSummary, DailyAttendanceRollup
+from tests.conftest import issue_api_token
+
+BATCH_URL = '/teacher/api/attendance/batch'
+
+
+def post_batch(client, entries, token=None, headers=None):
+    if headers is None:
+        headers = {'Authorization': f'Bearer {token}'}
+    return client.post(BATCH_URL, json={'entries': entries}, headers=headers)
+
+
+def entry(class_id, student_id, status, day='2025-03-03'):
+    return {'class_id': class_id, 'student_id': student_id, 'date': day, 'status': status}
+
+
+def test_batch_rejects_missing_malformed_and_revoked_tokens(app, client, make_class):
+    class_id, (student_id,) = make_class(1)
+    entries = [entry(class_id, student_id, 'present')]
+
+    assert post_batch(client, entries, headers={}).status_code == 401
+    assert post_batch(client, entries, headers={'Authorization': 'Token abc'}).status_code == 401
+    assert post_batch(client, entries, token='not-a-real-token').status_code == 401
+    old_token = issue_api_token(app, 'teacher')
+    issue_api_token(app, 'teacher') # Replaces the previous token
+    assert post_batch(client, entries, token=old_token).status_code == 401
+    with app.app_context():
+        assert Attendance.query.count() == 0
+
+
+def test_batch_is_all_or_nothing(app, client, make_class):
+    class_id, student_ids = make_class(2)
+    other_class_id, (outsider_id,) = make_class(1, name='Other Class')
+    token = issue_api_token(app, 'teacher')
+
+    response = post_batch(client, [
+        entry(class_id, student_ids[0], 'present'),
+        entry(class_id, student_ids[1], 'not-a-status'),
+        entry(class_id, outsider_id, 'late'), # Not enrolled in this class
+    ], token=token)
+
+    assert response.status_code == 400
+    assert [item['index'] for item in response.get_json()['entries']] == [1, 2]
+    with app.app_context():
+        assert Attendance.query.count() == 0
+        assert AttendanceSummary.query.count() == 0
+        assert DailyAttendanceRollup.query.count() == 0
+
+
+def test_batch_applies_entries_and_updates_counts(app, client, make_class):
+    class_id, student_ids = make_class(3)
+    token = issue_api_token(app, 'teacher')
+    app.config['WTF_CSRF_ENABLED'] = True # Bearer-token clients never send a CSRF token
+
+    response = post_batch(client, [
+        entry(class_id, student_ids[0], 'present'),
+        entry(class_id, student_ids[1], 'absent'),
+        entry(class_id, student_ids[2], 'late'),
+        entry(class_id, student_ids[0], 'late', day='2025-03-04'),
+    ], token=token)
+
+    assert response.status_code == 200
+    assert response.get_json()['created'] == 4
+    response = post_batch(client, [entry(class_id, student_ids[1], 'excused')], token=token)
+    assert response.get_json()['updated'] == 1
+    with app.app_context():
+        assert Attendance.query.count() == 4
+        summary = AttendanceSummary.query.filter_by(student_id=student_ids[0], subject_class_id=class_id).one()
+        assert (summary.present_count, summary.late_count, summary.total_count) == (1, 1, 2)
+        rollup = DailyAttendanceRollup.query.filter_by(date=date(2025, 3, 3), subject_class_id=class_id).one()
+        assert (rollup.present_count, rollup.absent_count, rollup.excused_count, rollup.late_count, rollup.total_count) == (1, 0, 1, 1, 3)
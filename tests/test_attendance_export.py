@@ -0,0 +1,58 @@
+# tests/test_attendance_export.py
+import csv
+import io
+from datetime import date
+from app import db
+from app.models import Attendance
+from app.attendance_export import csv_chunks
+from tests.conftest import login
+
+
+def test_csv_chunks_quotes_formula_cells():
+    text = ''.join(csv_chunks([['=HYPERLINK("http://x")', '+1', '-2', '@SUM(A1)', 'Late bus', 3, -4]]))
+    assert next(csv.reader(io.StringIO(text))) == ["'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", 'Late bus', '3', '-4']
+
+
+def test_matrix_export_does_not_leave_flash_messages(app, client, make_class):
+    class_id, student_ids = make_class(1)
+    with app.app_context():
+        db.session.add(Attendance(student_id=student_ids[0], subject_class_id=class_id, date=date(2025, 3, 3), status='late', remarks='=1+1'))
+        db.session.commit()
+    login(client, 'teacher')
+    client.get('/') # Consume the login flash
+
+    response = client.get(f'/teacher/class/{class_id}/attendance/matrix/export.csv',
+                          query_string={'start_date': '2020-01-01', 'end_date': '2025-12-31'}) # Over the two-year cap
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    response.get_data()
+    with client.session_transaction() as session:
+        assert not session.get('_flashes')
+
+
+def test_matrix_export_rejects_malformed_dates(client, make_class):
+    class_id, _ = make_class(1)
+    login(client, 'teacher')
+
+    response = client.get(f'/teacher/class/{class_id}/attendance/matrix/export.csv', query_string={'start_date': 'soon'})
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(f'/teacher/class/{class_id}/attendance/matrix')
+
+
+def test_class_records_export_streams_rows(app, client, make_class):
+    class_id, student_ids = make_class(2)
+    with app.app_context():
+        db.session.add_all([
+            Attendance(student_id=student_id, subject_class_id=class_id, date=date(2025, 3, 3), status='present')
+            for student_id in student_ids
+        ])
+        db.session.commit()
+    login(client, 'teacher')
+
+    response = client.get(f'/teacher/class/{class_id}/attendance/export.csv')
+
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0][0] == 'Date'
+    assert [row[7] for row in rows[1:]] == ['present', 'present']
@@ -0,0 +1,19 @@
+# tests/test_attendance_matrix.py
+from datetime import date, time
+from app import db
+from app.models import Attendance, Student
+from app.attendance_matrix import build_attendance_matrix, STATUS_CODES
+
+
+def test_matrix_cell_shows_the_latest_session_of_the_day(app, make_class):
+    class_id, student_ids = make_class(1)
+    with app.app_context():
+        # Inserted out of session order, so insertion (id) order would pick the wrong one
+        for session_time, status in ((time(16), 'absent'), (time(9), 'late'), (None, 'present')):
+            db.session.add(Attendance(student_id=student_ids[0], subject_class_id=class_id, date=date(2025, 3, 3),
+                                      session_time=session_time, status=status))
+        db.session.commit()
+
+        matrix = build_attendance_matrix(class_id, [db.session.get(Student, student_ids[0])], [date(2025, 3, 3)])
+
+        assert list(matrix.codes) == [STATUS_CODES['absent']]
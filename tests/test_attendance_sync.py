@@ -0,0 +1,24 @@
+# tests/test_attendance_sync.py
+from app.models import Attendance
+from tests.conftest import issue_api_token
+
+SYNC_URL = '/teacher/api/attendance/sync'
+
+
+def sync(client, token, mutations):
+    response = client.post(SYNC_URL, json={'mutations': mutations}, headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_repeated_key_is_applied_after_a_rejected_copy(app, client, make_class):
+    class_id, (student_id,) = make_class(1)
+    token = issue_api_token(app, 'teacher')
+    mutation = {'idempotency_key': 'key-1', 'class_id': class_id, 'student_id': student_id, 'date': '2025-03-03', 'status': 'late'}
+
+    body = sync(client, token, [dict(mutation, status='not-a-status'), mutation, mutation])
+
+    assert [result['status'] for result in body['results']] == ['rejected', 'applied', 'duplicate']
+    with app.app_context():
+        assert Attendance.query.filter_by(student_id=student_id, subject_class_id=class_id).one().status == 'late'
+    assert [result['status'] for result in sync(client, token, [mutation])['results']] == ['duplicate']
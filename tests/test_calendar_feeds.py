@@ -0,0 +1,69 @@
+# tests/test_calendar_feeds.py
+import re
+from app import db
+from app.models import SubjectClass, User, UserRole
+from app.calendar_feeds import _serializer
+from tests.conftest import login
+
+
+def feed_urls(client):
+    """Feed paths listed on the Calendar Feeds page, in page order (teachers, classes, rooms)."""
+    html = client.get('/calendar').get_data(as_text=True)
+    return list(dict.fromkeys(re.findall(r'value="http://localhost(/calendar/[^"]+\.ics)"', html)))
+
+
+def test_teacher_feed_links_work_until_reset(client, make_class):
+    make_class(1)
+    login(client, 'teacher')
+    teacher_url, class_url = feed_urls(client)
+
+    response = client.get(teacher_url)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/calendar'
+    assert client.get(class_url).status_code == 200
+
+    assert client.post('/calendar/reset').status_code == 302
+
+    assert client.get(teacher_url).status_code == 404
+    assert client.get(class_url).status_code == 404
+    new_teacher_url, _ = feed_urls(client)
+    assert new_teacher_url != teacher_url
+    assert client.get(new_teacher_url).status_code == 200
+
+
+def test_class_feed_stops_when_the_class_moves_to_another_teacher(app, client, make_class):
+    class_id, _ = make_class(1)
+    login(client, 'teacher')
+    _, class_url = feed_urls(client)
+
+    with app.app_context():
+        other = User(username='other', email='other@example.com', role=UserRole.TEACHER, first_name='Omar', last_name='Other')
+        other.set_password('x')
+        db.session.add(other)
+        db.session.flush()
+        db.session.get(SubjectClass, class_id).teacher_user_id = other.id
+        db.session.commit()
+
+    assert client.get(class_url).status_code == 404
+
+
+def test_feed_stops_when_its_owner_is_deactivated(app, client, make_class):
+    make_class(1)
+    login(client, 'teacher')
+    teacher_url, _ = feed_urls(client)
+    client.get('/auth/logout')
+
+    with app.app_context():
+        User.query.filter_by(username='teacher').one().is_active = False
+        db.session.commit()
+
+    assert client.get(teacher_url).status_code == 404
+
+
+def test_tokens_without_an_owner_are_rejected(app, client, make_class):
+    class_id, _ = make_class(1)
+    with app.test_request_context():
+        ownerless = _serializer().dumps(['class', class_id]) # The format before links had owners
+
+    assert client.get(f'/calendar/{ownerless}.ics').status_code == 404
+    assert client.get('/calendar/not-a-token.ics').status_code == 404
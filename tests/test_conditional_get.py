@@ -0,0 +1,32 @@
+# tests/test_conditional_get.py
+from tests.conftest import login
+
+
+def save_sheet(client, class_id, statuses):
+    data = {'attendance_date': '2025-03-03'}
+    for student_id, status in statuses.items():
+        data[f'status-{student_id}'] = status
+    response = client.post(f'/teacher/class/{class_id}/attendance/mark', data=data)
+    assert response.status_code == 302
+
+
+def test_matrix_etag_changes_when_statuses_swap(client, make_class):
+    class_id, (student_a, student_b) = make_class(2)
+    login(client, 'teacher')
+    matrix_url = f'/teacher/class/{class_id}/attendance/monthly'
+    month = {'year': 2025, 'month': 3}
+
+    save_sheet(client, class_id, {student_a: 'present', student_b: 'absent'})
+    client.get('/') # Consume the save's flash so the matrix may answer 304
+    first = client.get(matrix_url, query_string=month)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get(matrix_url, query_string=month, headers={'If-None-Match': etag}).status_code == 304
+
+    # The day's status counts are the same after the swap, but the page is not
+    save_sheet(client, class_id, {student_a: 'absent', student_b: 'present'})
+    client.get('/')
+    response = client.get(matrix_url, query_string=month, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,139 @@
+# tests/test_mark_attendance.py
+from datetime import date, time
+from app import db
+from app.models import Attendance, ClassSchedule
+from tests.conftest import QueryCounter, login
+
+SHEET_DATE = '2025-03-03'
+
+
+def mark_url(class_id):
+    return f'/teacher/class/{class_id}/attendance/mark'
+
+
+def sheet_data(student_ids, status, remarks=''):
+    data = {'attendance_date': SHEET_DATE}
+    for student_id in student_ids:
+        data[f'status-{student_id}'] = status
+        data[f'remarks-{student_id}'] = remarks
+    return data
+
+
+def render_sheet(client, class_id):
+    response = client.get(mark_url(class_id), query_string={'attendance_date': SHEET_DATE})
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def count_sheet_render(app, client, class_id):
+    with QueryCounter(app) as counter:
+        render_sheet(client, class_id)
+    return counter.count
+
+
+def count_sheet_save(app, client, class_id, student_ids, status):
+    with QueryCounter(app) as counter:
+        response = client.post(mark_url(class_id), data=sheet_data(student_ids, status))
+    assert response.status_code == 302
+    return counter.count
+
+
+def selected_status(html, student_id):
+    select = html.split(f'name="status-{student_id}"', 1)[1].split('</select>', 1)[0]
+    return select.split(' selected>', 1)[0].rsplit('value="', 1)[1].rstrip('"')
+
+
+def test_sheet_renders_existing_records(app, client, make_class):
+    class_id, student_ids = make_class(3)
+    with app.app_context():
+        db.session.add_all([
+            Attendance(student_id=student_ids[0], subject_class_id=class_id, date=date(2025, 3, 3), status='late', remarks='Bus delayed'),
+            Attendance(student_id=student_ids[1], subject_class_id=class_id, date=date(2025, 3, 3), status='absent'),
+        ])
+        db.session.commit()
+    login(client, 'teacher')
+
+    html = render_sheet(client, class_id)
+
+    assert selected_status(html, student_ids[0]) == 'late'
+    assert selected_status(html, student_ids[1]) == 'absent'
+    assert selected_status(html, student_ids[2]) == 'present' # No record yet: the default
+    assert 'value="Bus delayed"' in html
+
+
+def test_sheet_render_query_count_does_not_grow_with_class_size(app, client, make_class):
+    small_class_id, small_student_ids = make_class(5, name='Small Class')
+    large_class_id, large_student_ids = make_class(50, name='Large Class')
+    login(client, 'teacher')
+    for class_id, student_ids in ((small_class_id, small_student_ids), (large_class_id, large_student_ids)):
+        client.post(mark_url(class_id), data=sheet_data(student_ids, 'late'))
+        render_sheet(client, class_id) # Warm the per-worker caches
+
+    assert count_sheet_render(app, client, small_class_id) == count_sheet_render(app, client, large_class_id)
+    assert all(selected_status(render_sheet(client, large_class_id), student_id) == 'late' for student_id in large_student_ids)
+
+
+def test_sheet_save_query_count_does_not_grow_with_class_size(app, client, make_class):
+    small_class_id, small_student_ids = make_class(5, name='Small Class')
+    large_class_id, large_student_ids = make_class(50, name='Large Class')
+    login(client, 'teacher')
+    for class_id in (small_class_id, large_class_id):
+        render_sheet(client, class_id) # Warm the per-worker caches
+
+    assert count_sheet_save(app, client, small_class_id, small_student_ids, 'present') == \
+        count_sheet_save(app, client, large_class_id, large_student_ids, 'present') # Every row inserted
+    assert count_sheet_save(app, client, small_class_id, small_student_ids, 'late') == \
+        count_sheet_save(app, client, large_class_id, large_student_ids, 'late') # Every row updated
+    with app.app_context():
+        assert Attendance.query.filter_by(subject_class_id=large_class_id, status='late').count() == 50
+
+
+def test_resaving_blank_remarks_leaves_records_untouched(app, client, make_class):
+    class_id, student_ids = make_class(2)
+    with app.app_context():
+        db.session.add_all([
+            Attendance(student_id=student_id, subject_class_id=class_id, date=date(2025, 3, 3), status='late', remarks=None)
+            for student_id in student_ids
+        ])
+        db.session.commit()
+        updated_at = {record.id: record.updated_at for record in Attendance.query}
+    login(client, 'teacher')
+
+    with QueryCounter(app) as counter:
+        client.post(mark_url(class_id), data=sheet_data(student_ids, 'late', remarks=''))
+
+    assert not any(statement.startswith('UPDATE attendance_records') for statement in counter.statements)
+    with app.app_context():
+        assert {record.id: record.updated_at for record in Attendance.query} == updated_at
+
+
+def test_daily_and_week_sheets_share_session_records(app, client, make_class):
+    class_id, student_ids = make_class(2)
+    with app.app_context():
+        db.session.add_all([
+            ClassSchedule(subject_class_id=class_id, day_of_week=0, start_time=time(9), end_time=time(10)),
+            ClassSchedule(subject_class_id=class_id, day_of_week=0, start_time=time(16), end_time=time(17)),
+        ])
+        db.session.commit()
+    login(client, 'teacher')
+
+    week_data = {'week': SHEET_DATE}
+    for student_id in student_ids:
+        week_data[f'status-{student_id}-202503030900'] = 'late'
+        week_data[f'status-{student_id}-202503031600'] = 'present'
+    assert client.post(f'/teacher/class/{class_id}/attendance/week', data=week_data).status_code == 302
+
+    html = render_sheet(client, class_id) # Opens on the day's first session
+    assert all(selected_status(html, student_id) == 'late' for student_id in student_ids)
+
+    assert client.post(mark_url(class_id), data=sheet_data(student_ids, 'absent')).status_code == 302
+    afternoon = sheet_data(student_ids, 'excused')
+    afternoon['session'] = '1600'
+    assert client.post(mark_url(class_id), data=afternoon).status_code == 302
+
+    with app.app_context():
+        records = Attendance.query.filter_by(subject_class_id=class_id, date=date(2025, 3, 3)).all()
+        assert sorted((r.student_id, r.session_time, r.status) for r in records) == sorted(
+            (student_id, session_time, status) for student_id in student_ids
+            for session_time, status in ((time(9), 'absent'), (time(16), 'excused'))
+        )
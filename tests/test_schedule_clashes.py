@@ -0,0 +1,63 @@
+# tests/test_schedule_clashes.py
+from datetime import date, time
+from app import db
+from app.models import ClassSchedule
+from app.schedule_clashes import ClashIndex, make_interval, find_schedule_clashes
+
+MONDAY, TUESDAY = 0, 1
+
+
+def interval(class_id, start, end, location='Studio 1', teacher_user_id=None, day_of_week=MONDAY):
+    return make_interval(day_of_week, time(*start), time(*end), location, class_id, f'Class {class_id}',
+                         date(2025, 1, 1), date(2025, 12, 31), teacher_user_id)
+
+
+def test_room_and_teacher_clashes_on_the_same_weekday():
+    index = ClashIndex([
+        interval(1, (9, 0), (10, 0), location='Studio 1', teacher_user_id=10),
+        interval(2, (9, 30), (10, 30), location='studio  1', teacher_user_id=20), # Same room, spelt differently
+        interval(3, (9, 45), (11, 0), location='Hall', teacher_user_id=30),
+        interval(4, (9, 0), (10, 0), location='Studio 1', teacher_user_id=30, day_of_week=TUESDAY),
+    ])
+
+    clashes = index.clashes_with(interval(5, (9, 40), (10, 15), location='Studio 1', teacher_user_id=30))
+
+    assert sorted((clash.kind, clash.other.class_id) for clash in clashes) == [('room', 1), ('room', 2), ('teacher', 3)]
+
+
+def test_back_to_back_sessions_do_not_clash(app):
+    index = ClashIndex([interval(1, (9, 0), (10, 0), teacher_user_id=10)])
+
+    assert index.clashes_with(interval(2, (10, 0), (11, 0), teacher_user_id=10)) == []
+    assert index.clashes_with(interval(3, (8, 0), (9, 0), teacher_user_id=10)) == []
+    assert index.audit() == ClashIndex([
+        interval(1, (9, 0), (10, 0), teacher_user_id=10), interval(2, (10, 0), (11, 0), teacher_user_id=10),
+    ]).audit() == []
+    with app.app_context(): # Proposed sessions are also checked against each other
+        assert find_schedule_clashes([interval(2, (10, 0), (11, 0)), interval(2, (9, 0), (10, 0))]) == []
+
+
+def test_exclude_class_id_skips_the_schedule_being_edited(app, make_class):
+    class_id, _ = make_class(1)
+    with app.app_context():
+        db.session.add(ClassSchedule(subject_class_id=class_id, day_of_week=MONDAY, start_time=time(9), end_time=time(10), location='Studio 1'))
+        db.session.commit()
+        moved = [interval(class_id, (9, 30), (10, 30))]
+
+        assert [clash.other.class_id for _, clash in find_schedule_clashes(moved)] == [class_id]
+        assert find_schedule_clashes(moved, exclude_class_id=class_id) == []
+        assert [clash.other.class_id for _, clash in find_schedule_clashes(moved, exclude_class_id=class_id + 1)] == [class_id]
+
+
+def test_audit_reports_each_clashing_pair_once():
+    index = ClashIndex([
+        interval(1, (9, 0), (12, 0), teacher_user_id=10),
+        interval(2, (9, 30), (10, 30), teacher_user_id=20),
+        interval(3, (10, 0), (11, 0), teacher_user_id=30),
+        interval(4, (11, 0), (12, 0), location='Hall', teacher_user_id=10),
+        interval(5, (12, 0), (13, 0), teacher_user_id=20), # Touches class 1, clashes with nothing
+    ])
+
+    pairs = [(clash.kind, clash.interval.class_id, clash.other.class_id) for clash in index.audit()]
+
+    assert sorted(pairs) == [('room', 1, 2), ('room', 1, 3), ('room', 2, 3), ('teacher', 1, 4)]